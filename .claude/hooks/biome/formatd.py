@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""Coalescing Biome formatter for the post-write hook.
+
+The hook (``post-write.sh``) hands file paths to a long-lived worker over a
+Unix socket and returns immediately. The worker debounces writes, formats each
+batch with a single Biome call and exits after a period of inactivity.
+
+Usage:
+    formatd.py hook [--sync]     Read a Claude hook payload from stdin
+    formatd.py serve --root DIR  Run the worker in the foreground
+    formatd.py stats [--root DIR]
+                                 Print the latency histograms
+
+Environment:
+    CLAUDE_BIOME_SYNC=1          Wait for the batch and report Biome errors
+    CLAUDE_BIOME_ARGS            Biome arguments (default: "format --write")
+    CLAUDE_BIOME_DEBOUNCE_MS     Quiet period before a batch runs (default: 150)
+    CLAUDE_BIOME_MAX_WAIT_MS     Upper bound on batching delay (default: 1000)
+    CLAUDE_BIOME_IDLE_SECONDS    Worker lifetime without requests (default: 600)
+    CLAUDE_BIOME_SYNC_TIMEOUT    Max seconds a sync hook waits for its batch (default: 30)
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+EXTENSIONS = {
+    ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".mts", ".cts",
+    ".json", ".jsonc", ".css", ".graphql", ".gql",
+}
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+CONNECT_TIMEOUT = 2.0
+SYNC_TIMEOUT = float(os.environ.get("CLAUDE_BIOME_SYNC_TIMEOUT", 30))
+
+
+def env_ms(name, default):
+    return float(os.environ.get(name, default)) / 1000
+
+
+def project_key(root):
+    return hashlib.sha256(os.path.realpath(root).encode()).hexdigest()[:16]
+
+
+def socket_path(root):
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    directory = os.path.join(base, f"claude-biome-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, f"{project_key(root)}.sock")
+
+
+def stats_path(root):
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    directory = os.path.join(base, "claude-template", "biome")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"{project_key(root)}.json")
+
+
+def biome_command(root):
+    local = os.path.join(root, "node_modules", ".bin", "biome")
+    if os.access(local, os.X_OK):
+        binary = [local]
+    elif shutil.which("biome"):
+        binary = ["biome"]
+    else:
+        binary = ["npx", "--no-install", "biome"]
+    args = shlex.split(os.environ.get("CLAUDE_BIOME_ARGS", "format --write"))
+    return binary + args + ["--no-errors-on-unmatched", "--files-ignore-unknown=true"]
+
+
+def run_biome(root, paths):
+    """Format ``paths`` with one Biome process. Returns (ok, output)."""
+    try:
+        result = subprocess.run(
+            biome_command(root) + sorted(paths),
+            cwd=root,
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            text=True,
+        )
+    except OSError as error:
+        return False, str(error)
+    return result.returncode == 0, (result.stdout + result.stderr).strip()
+
+
+class Histogram:
+    """Fixed log-scale latency buckets in milliseconds."""
+
+    def __init__(self, counts=None, total=0.0):
+        self.counts = counts or [0] * (len(BUCKETS_MS) + 1)
+        self.total = total
+
+    def add(self, ms):
+        index = next((i for i, edge in enumerate(BUCKETS_MS) if ms <= edge), len(BUCKETS_MS))
+        self.counts[index] += 1
+        self.total += ms
+
+    def to_dict(self):
+        labels = [f"<={edge}" for edge in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+        calls = sum(self.counts)
+        return {
+            "calls": calls,
+            "mean_ms": round(self.total / calls, 2) if calls else 0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        counts = list(data.get("buckets", {}).values())
+        if len(counts) != len(BUCKETS_MS) + 1:
+            return cls()
+        return cls(counts, data.get("mean_ms", 0) * data.get("calls", 0))
+
+
+class Request:
+    def __init__(self, paths):
+        self.paths = paths
+        self.received = time.monotonic()
+        self.done = threading.Event()
+        self.ok = True
+        self.output = ""
+
+
+class Batcher:
+    """Collects requests and formats them in debounced batches."""
+
+    def __init__(self, root):
+        self.root = root
+        self.debounce = env_ms("CLAUDE_BIOME_DEBOUNCE_MS", 150)
+        self.max_wait = env_ms("CLAUDE_BIOME_MAX_WAIT_MS", 1000)
+        self.pending = []
+        self.busy = False
+        self.first_at = self.last_at = 0.0
+        self.condition = threading.Condition()
+        self.stats_file = stats_path(root)
+        self.histograms = self._load_stats()
+        self.last_activity = time.monotonic()
+
+    def _load_stats(self):
+        names = ("hook", "format", "end_to_end")
+        try:
+            with open(self.stats_file) as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            data = {}
+        return {name: Histogram.from_dict(data.get(name, {})) for name in names}
+
+    def save_stats(self):
+        """Best effort: the cache directory may have been cleaned meanwhile."""
+        data = {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+        data["root"] = self.root
+        tmp = f"{self.stats_file}.{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+            with open(tmp, "w") as handle:
+                json.dump(data, handle, indent=2)
+            os.replace(tmp, self.stats_file)
+        except OSError:
+            pass
+
+    def record(self, name, ms):
+        with self.condition:
+            self.histograms[name].add(ms)
+
+    def submit(self, request):
+        now = time.monotonic()
+        with self.condition:
+            if not self.pending:
+                self.first_at = now
+            self.pending.append(request)
+            self.last_at = self.last_activity = now
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                while True:
+                    now = time.monotonic()
+                    deadline = min(self.last_at + self.debounce, self.first_at + self.max_wait)
+                    if now >= deadline:
+                        break
+                    self.condition.wait(deadline - now)
+                batch, self.pending = self.pending, []
+                self.busy = True
+            self._format(batch)
+
+    def _format(self, batch):
+        """Format one batch. Never raises: every request is always completed,
+        otherwise sync hooks would wait forever and the worker never idle out."""
+        ok, output = False, ""
+        try:
+            paths = {path for request in batch for path in request.paths if os.path.exists(path)}
+            started = time.monotonic()
+            ok, output = run_biome(self.root, paths) if paths else (True, "")
+            finished = time.monotonic()
+            with self.condition:
+                self.histograms["format"].add((finished - started) * 1000)
+                for request in batch:
+                    self.histograms["end_to_end"].add((finished - request.received) * 1000)
+                self.save_stats()
+        except Exception as error:  # noqa: BLE001 - keep the batch thread alive
+            output = output or f"formatd: {type(error).__name__}: {error}"
+        finally:
+            with self.condition:
+                self.busy = False
+                self.last_activity = time.monotonic()
+            for request in batch:
+                request.ok, request.output = ok, output
+                request.done.set()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        batcher = self.server.batcher
+        try:
+            message = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+        request = Request([os.path.join(batcher.root, path) for path in message.get("paths", [])])
+        batcher.submit(request)
+        if message.get("sync"):
+            if request.done.wait(SYNC_TIMEOUT):
+                reply = {"ok": request.ok, "output": request.output}
+            else:
+                reply = {"ok": False, "output": f"formatd: no result after {SYNC_TIMEOUT:g}s"}
+        else:
+            reply = {"queued": len(request.paths)}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+        self.wfile.flush()
+
+        # The client reports its own wall time once it has the reply
+        self.connection.settimeout(1.0)
+        try:
+            report = json.loads(self.rfile.readline() or b"{}")
+        except (OSError, ValueError):
+            return
+        if "hook_ms" in report:
+            batcher.record("hook", float(report["hook_ms"]))
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(root):
+    root = os.path.realpath(root)
+    path = socket_path(root)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if connect(path) is not None:
+            return 0  # Another worker won the race
+        if os.path.exists(path):
+            os.unlink(path)
+        server = Server(path, Handler)
+    server.batcher = Batcher(root)
+    worker = threading.Thread(target=server.batcher.run, daemon=True)
+    worker.start()
+
+    idle = float(os.environ.get("CLAUDE_BIOME_IDLE_SECONDS", 600))
+    server.timeout = 5
+    batcher = server.batcher
+    try:
+        while worker.is_alive() and (
+            time.monotonic() - batcher.last_activity < idle or batcher.pending or batcher.busy
+        ):
+            server.handle_request()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+    return 0
+
+
+def connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def spawn_worker(root):
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "serve", "--root", root],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+
+
+def connect_or_spawn(root):
+    path = socket_path(root)
+    client = connect(path)
+    if client is not None:
+        return client
+    spawn_worker(root)
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        client = connect(path)
+        if client is not None:
+            return client
+    return None
+
+
+def hook_paths(payload, root):
+    tool_input = payload.get("tool_input") or {}
+    path = tool_input.get("file_path") or tool_input.get("path")
+    if not path or os.path.splitext(path)[1].lower() not in EXTENSIONS:
+        return []
+    return [os.path.relpath(os.path.join(root, path), root)]
+
+
+def hook_started():
+    """Wall-clock start of the hook, including interpreter startup when the
+    shell wrapper exported it."""
+    try:
+        return float(os.environ["CLAUDE_HOOK_STARTED"])
+    except (KeyError, ValueError):
+        return time.time()
+
+
+def hook(sync):
+    started = hook_started()
+    try:
+        payload = json.load(sys.stdin)
+    except ValueError:
+        payload = {}
+    root = payload.get("cwd") or os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+    paths = hook_paths(payload, root)
+    if not paths:
+        return 0
+
+    client = connect_or_spawn(root)
+    if client is None:
+        # No worker available: format inline like the old hook did
+        ok, output = run_biome(root, [os.path.join(root, path) for path in paths])
+    else:
+        # The worker answers a sync request within SYNC_TIMEOUT; this is the backstop
+        client.settimeout(SYNC_TIMEOUT + CONNECT_TIMEOUT)
+        try:
+            with client, client.makefile("rwb") as stream:
+                stream.write(json.dumps({"paths": paths, "sync": sync}).encode() + b"\n")
+                stream.flush()
+                reply = json.loads(stream.readline() or b"{}")
+                ok, output = reply.get("ok", True), reply.get("output", "")
+                hook_ms = (time.time() - started) * 1000
+                stream.write(json.dumps({"hook_ms": hook_ms}).encode() + b"\n")
+                stream.flush()
+        except (OSError, ValueError) as error:
+            ok, output = not sync, f"formatd: {error}"
+
+    if not ok:
+        print(output, file=sys.stderr)
+        return 1
+    return 0
+
+
+def stats(root):
+    try:
+        with open(stats_path(root)) as handle:
+            data = handle.read()
+    except OSError:
+        print("No latency data recorded yet", file=sys.stderr)
+        return 1
+    print(data)
+    return 0
+
+
+def main(argv):
+    command = argv[0] if argv else "hook"
+    root = os.getcwd()
+    if "--root" in argv:
+        root = argv[argv.index("--root") + 1]
+    if command == "hook":
+        return hook("--sync" in argv or os.environ.get("CLAUDE_BIOME_SYNC") == "1")
+    if command == "serve":
+        return serve(root)
+    if command == "stats":
+        return stats(root)
+    print(__doc__, file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
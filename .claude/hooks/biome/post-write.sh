@@ -0,0 +1,16 @@
+#!/bin/bash
+# Biome post-write hook for WSL/Linux/Mac
+#
+# Hands the written file to a long-lived formatter worker (formatd.py) and
+# returns without waiting. Set CLAUDE_BIOME_SYNC=1 to wait for Biome and see
+# its errors.
+
+# Opt-in timing records (see hooks/trace.sh)
+if [ -n "${CLAUDE_HOOK_TRACE:-}" ] && [ -z "${CLAUDE_HOOK_TRACED:-}" ]; then
+    exec "$(dirname "$0")/../trace.sh" biome-post-write "$0" "$@"
+fi
+
+# Lets the worker's latency histogram include interpreter startup
+export CLAUDE_HOOK_STARTED="${EPOCHREALTIME/,/.}"
+
+exec python3 "$(dirname "$0")/formatd.py" hook "$@"
@@ -0,0 +1,66 @@
+#!/bin/bash
+# Opt-in timing wrapper for hooks
+#
+# Usage: trace.sh <hook-name> <command> [args...]
+#
+# When CLAUDE_HOOK_TRACE is set, runs the command and appends one JSONL record
+# per invocation to that file ("1" means ~/.cache/claude-template/hook-trace.jsonl):
+#   {"ts": ..., "hook": ..., "files": N, "wall_ms": ..., "exit": N}
+# The hook's stdin is passed through unchanged. Without CLAUDE_HOOK_TRACE the
+# command is exec'd directly.
+
+HOOK_NAME="$1"
+shift
+
+if [ -z "${CLAUDE_HOOK_TRACE:-}" ]; then
+    exec "$@"
+fi
+
+TRACE_FILE="$CLAUDE_HOOK_TRACE"
+if [ "$TRACE_FILE" = 1 ]; then
+    TRACE_FILE="${XDG_CACHE_HOME:-$HOME/.cache}/claude-template/hook-trace.jsonl"
+fi
+mkdir -p "$(dirname "$TRACE_FILE")"
+
+now_us() {
+    if [ -n "${EPOCHREALTIME:-}" ]; then
+        local t="${EPOCHREALTIME/[.,]/}"
+        echo "$((10#$t))"
+    else
+        echo "$(($(date +%s) * 1000000))"
+    fi
+}
+
+START="$(now_us)"
+
+# Buffer the payload so the files it names can be counted (git hooks get none)
+PAYLOAD=""
+if [ "$HOOK_NAME" != "pre-commit" ] && [ ! -t 0 ]; then
+    PAYLOAD="$(mktemp)"
+    trap 'rm -f "$PAYLOAD"' EXIT
+    cat > "$PAYLOAD"
+fi
+
+if [ "$HOOK_NAME" = "pre-commit" ]; then
+    FILES="$(git diff --cached --name-only 2> /dev/null | wc -l | tr -d ' ')"
+elif [ -n "$PAYLOAD" ]; then
+    FILES="$(grep -o '"file_path"' "$PAYLOAD" | wc -l | tr -d ' ')"
+else
+    FILES=0
+fi
+
+# Hooks that re-exec through this wrapper must not trace twice
+export CLAUDE_HOOK_TRACED=1
+if [ -n "$PAYLOAD" ]; then
+    "$@" < "$PAYLOAD"
+else
+    "$@"
+fi
+EXIT_CODE=$?
+
+ELAPSED=$(($(now_us) - START))
+printf '{"ts": %s, "hook": "%s", "files": %d, "wall_ms": %d.%03d, "exit": %d}\n' \
+    "$(date +%s)" "$HOOK_NAME" "$FILES" $((ELAPSED / 1000)) $((ELAPSED % 1000)) "$EXIT_CODE" \
+    >> "$TRACE_FILE"
+
+exit "$EXIT_CODE"
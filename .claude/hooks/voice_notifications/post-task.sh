@@ -0,0 +1,45 @@
+#!/bin/bash
+# Voice notification hook for WSL/Linux/Mac
+#
+# Queues the announcement for a detached worker (voiced.py) and returns
+# immediately. Bursts of completions are merged into one announcement.
+# The enqueue is plain shell so the hook costs a few milliseconds; Python
+# only starts when no worker is running yet. This is the only writer of the
+# spool that voiced.py drains.
+
+# Opt-in timing records (see hooks/trace.sh)
+if [ -n "${CLAUDE_HOOK_TRACE:-}" ] && [ -z "${CLAUDE_HOOK_TRACED:-}" ]; then
+    exec "$(dirname "$0")/../trace.sh" voice-post-task "$0" "$@"
+fi
+
+MESSAGE="${*:-${CLAUDE_VOICE_MESSAGE:-Task completed}}"
+
+# Drain the hook payload so Claude is not blocked on the pipe
+[ -t 0 ] || cat > /dev/null
+
+TMP_BASE="${TMPDIR:-/tmp}"
+RUNTIME_DIR="${XDG_RUNTIME_DIR:-${TMP_BASE%/}}/claude-voice-${UID:-$(id -u)}"
+mkdir -p -m 700 "$RUNTIME_DIR/queue"
+
+# Nanosecond names sort in arrival order, like voiced.py's time_ns()
+if [ -n "${EPOCHREALTIME:-}" ]; then
+    NAME="${EPOCHREALTIME/[.,]/}000-$$"
+else
+    NAME="$(date +%s)000000000-$$"
+fi
+printf '%s' "$MESSAGE" > "$RUNTIME_DIR/queue/.$NAME"
+mv -f "$RUNTIME_DIR/queue/.$NAME" "$RUNTIME_DIR/queue/$NAME.msg"
+
+# A running worker holds worker.lock and will pick the message up
+if command -v flock > /dev/null 2>&1 \
+    && ! flock -n "$RUNTIME_DIR/worker.lock" true 2> /dev/null; then
+    exit 0
+fi
+
+WORKER="$(dirname "$0")/voiced.py"
+if command -v setsid > /dev/null 2>&1; then
+    setsid python3 "$WORKER" work < /dev/null > /dev/null 2>&1 &
+else
+    nohup python3 "$WORKER" work < /dev/null > /dev/null 2>&1 &
+fi
+exit 0
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Non-blocking voice notifications for the post-task hook.
+
+The hook (``post-task.sh``) drops the message into a spool directory and
+returns; it is the only writer of the spool format (``queue/<time_ns>-<pid>.msg``,
+written to a dot-file and renamed). A detached worker waits for the burst to
+settle, turns everything queued into one announcement and plays it. Rendered
+phrases are kept in a bounded on-disk cache (LRU by mtime) and replayed
+instead of re-synthesized.
+
+Usage:
+    voiced.py work               Drain the queue in the foreground
+    voiced.py say MESSAGE        Render and play MESSAGE synchronously
+
+Environment:
+    CLAUDE_VOICE_BACKEND         say | espeak | powershell | stub | none (default: auto)
+    CLAUDE_VOICE_MESSAGE         Default message (read by post-task.sh)
+    CLAUDE_VOICE_BURST           Announcement for several tasks (default: "{count} tasks completed")
+    CLAUDE_VOICE_COALESCE_MS     Quiet period before announcing (default: 800)
+    CLAUDE_VOICE_MAX_WAIT_MS     Upper bound on the coalescing delay (default: 3000)
+    CLAUDE_VOICE_CACHE_ENTRIES   Max cached phrases (default: 64)
+    CLAUDE_VOICE_CACHE_BYTES     Max cache size (default: 20 MB)
+    CLAUDE_VOICE_STUB_LOG        Where the stub backend logs playback
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+DEFAULT_MESSAGE = "Task completed"
+
+
+def runtime_dir():
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    directory = os.path.join(base, f"claude-voice-{os.getuid()}")
+    os.makedirs(os.path.join(directory, "queue"), mode=0o700, exist_ok=True)
+    return directory
+
+
+def cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    directory = os.path.join(base, "claude-template", "voice")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+class Backend:
+    name = "none"
+    extension = "wav"
+
+    def render(self, text, path):
+        raise NotImplementedError
+
+    def play(self, path):
+        raise NotImplementedError
+
+
+class SayBackend(Backend):
+    name = "say"
+    extension = "aiff"
+
+    def render(self, text, path):
+        subprocess.run(["say", "-o", path, text], check=True)
+
+    def play(self, path):
+        subprocess.run(["afplay", path], check=True)
+
+
+class EspeakBackend(Backend):
+    name = "espeak"
+
+    def __init__(self):
+        self.binary = shutil.which("espeak-ng") or "espeak"
+
+    def render(self, text, path):
+        subprocess.run([self.binary, "-w", path, text], check=True)
+
+    def play(self, path):
+        for player in (["paplay"], ["aplay", "-q"], ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"]):
+            if shutil.which(player[0]):
+                subprocess.run(player + [path], check=True)
+                return
+        raise RuntimeError("no audio player found (paplay, aplay or ffplay)")
+
+
+class PowerShellBackend(Backend):
+    """WSL: System.Speech renders to a WAV the Windows side can read."""
+
+    name = "powershell"
+
+    def _windows_path(self, path):
+        return subprocess.run(["wslpath", "-w", path], capture_output=True, text=True, check=True).stdout.strip()
+
+    def render(self, text, path):
+        quoted = text.replace("'", "''")
+        script = (
+            "Add-Type -AssemblyName System.Speech; "
+            "$s = New-Object System.Speech.Synthesis.SpeechSynthesizer; "
+            f"$s.SetOutputToWaveFile('{self._windows_path(path)}'); $s.Speak('{quoted}'); $s.Dispose()"
+        )
+        subprocess.run(["powershell.exe", "-NoProfile", "-Command", script], check=True)
+
+    def play(self, path):
+        script = f"(New-Object Media.SoundPlayer '{self._windows_path(path)}').PlaySync()"
+        subprocess.run(["powershell.exe", "-NoProfile", "-Command", script], check=True)
+
+
+class StubBackend(Backend):
+    """Headless backend for tests: renders the text to a file and logs plays."""
+
+    name = "stub"
+
+    def render(self, text, path):
+        with open(path, "w") as handle:
+            handle.write(text)
+
+    def play(self, path):
+        log = os.environ.get("CLAUDE_VOICE_STUB_LOG") or os.path.join(cache_dir(), "stub.log")
+        with open(path) as handle:
+            text = handle.read()
+        with open(log, "a") as handle:
+            handle.write(json.dumps({"time": time.time(), "text": text, "file": path, "pid": os.getpid()}) + "\n")
+
+
+BACKENDS = {
+    "say": SayBackend,
+    "espeak": EspeakBackend,
+    "powershell": PowerShellBackend,
+    "stub": StubBackend,
+}
+
+
+def is_wsl():
+    try:
+        with open("/proc/version") as handle:
+            return "microsoft" in handle.read().lower()
+    except OSError:
+        return False
+
+
+def pick_backend():
+    name = os.environ.get("CLAUDE_VOICE_BACKEND", "auto")
+    if name == "auto":
+        if sys.platform == "darwin":
+            name = "say"
+        elif is_wsl():
+            name = "powershell"
+        elif shutil.which("espeak-ng") or shutil.which("espeak"):
+            name = "espeak"
+        else:
+            name = "none"
+    backend = BACKENDS.get(name)
+    return backend() if backend else None
+
+
+class AudioCache:
+    """Rendered phrases keyed by backend and text, evicted least recently used."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.directory = cache_dir()
+        self.max_entries = int(os.environ.get("CLAUDE_VOICE_CACHE_ENTRIES", 64))
+        self.max_bytes = int(os.environ.get("CLAUDE_VOICE_CACHE_BYTES", 20 * 1024 * 1024))
+
+    def path(self, text):
+        key = hashlib.sha256(f"{self.backend.name}\0{text}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{key}.{self.backend.extension}")
+
+    def get(self, text):
+        path = self.path(text)
+        if os.path.exists(path):
+            os.utime(path)  # Mark as recently used
+            return path
+        tmp = f"{path}.{os.getpid()}.tmp.{self.backend.extension}"
+        self.backend.render(text, tmp)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".log") and ".tmp." not in entry.name:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        total = 0
+        for index, (_, size, path) in enumerate(entries):
+            total += size
+            if index >= self.max_entries or total > self.max_bytes:
+                os.unlink(path)
+
+
+def queued():
+    directory = os.path.join(runtime_dir(), "queue")
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".msg"))
+
+
+def try_lock():
+    """Worker lock held for the worker's lifetime; None if already taken."""
+    handle = open(os.path.join(runtime_dir(), "worker.lock"), "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def announcement(messages):
+    if len(messages) == 1:
+        return messages[0]
+    return os.environ.get("CLAUDE_VOICE_BURST", "{count} tasks completed").format(count=len(messages))
+
+
+def take_burst(coalesce, max_wait):
+    """Wait until no new message arrived for ``coalesce`` seconds, or at most
+    ``max_wait`` seconds, then consume and return everything queued."""
+    deadline = time.monotonic() + max_wait
+    seen = None
+    while True:
+        paths = queued()
+        if paths == seen:
+            break
+        seen = paths
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break  # Steady completions must not postpone the announcement forever
+        time.sleep(min(coalesce, remaining))
+    messages = []
+    for path in seen:
+        try:
+            with open(path) as handle:
+                messages.append(handle.read().strip() or DEFAULT_MESSAGE)
+            os.unlink(path)
+        except OSError:
+            continue
+    return messages
+
+
+def work():
+    lock = try_lock()
+    if lock is None:
+        return 0  # Another worker is draining the queue
+    backend = pick_backend()
+    cache = AudioCache(backend) if backend else None
+    coalesce = float(os.environ.get("CLAUDE_VOICE_COALESCE_MS", 800)) / 1000
+    max_wait = float(os.environ.get("CLAUDE_VOICE_MAX_WAIT_MS", 3000)) / 1000
+    while True:
+        while queued():
+            messages = take_burst(coalesce, max_wait)
+            if messages and cache:
+                try:
+                    backend.play(cache.get(announcement(messages)))
+                except (OSError, RuntimeError, subprocess.CalledProcessError):
+                    pass
+        # Release, then re-check so a message queued while exiting is not lost
+        lock.close()
+        if not queued():
+            return 0
+        lock = try_lock()
+        if lock is None:
+            return 0
+
+
+def say(argv):
+    backend = pick_backend()
+    if backend is None:
+        print("No TTS backend available", file=sys.stderr)
+        return 1
+    backend.play(AudioCache(backend).get(" ".join(argv) or DEFAULT_MESSAGE))
+    return 0
+
+
+def main(argv):
+    command = argv[0] if argv else ""
+    if command == "work":
+        return work()
+    if command == "say":
+        return say(argv[1:])
+    print(__doc__, file=sys.stderr)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
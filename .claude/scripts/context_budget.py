@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Context-budget check for CLAUDE.md and the files it @-references.
+
+CLAUDE.md and everything it pulls in with ``@file.md`` is sent on every turn,
+so each token costs across every session. This resolves the references,
+counts tokens per file and per section, flags lines duplicated across
+CLAUDE.md, the referenced guidelines and commands/*.md, and fails when a
+budget is exceeded. Token counts are cached per file hash in
+.claude/.cache/context-budget.json, so the check is cheap in a pre-commit hook.
+
+Usage:
+    context_budget.py [--root .claude] [--budget FILE=TOKENS]... [--total TOKENS]
+                      [--sections] [--fail-on-duplicates] [--bundle OUT]
+
+Token counts use tiktoken (cl100k_base) when it is installed and its encoding
+can be loaded, and an estimate otherwise (with a warning). The estimate counts
+every non-ASCII character, e.g. each Hangul syllable, as at least one token.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+
+CACHE_VERSION = 2
+DEFAULT_BUDGETS = {"CLAUDE.md": 500}
+MAX_IMPORT_DEPTH = 5
+MIN_DUPLICATE_CHARS = 24
+
+REFERENCE = re.compile(r"(?<![\w`])@([\w./~-]+\.md)\b")
+HEADING = re.compile(r"^(#{1,6})\s+(.*)")
+CODE_FENCE = re.compile(r"^\s*(```|~~~)")
+HTML_COMMENT = re.compile(r"<!--.*?-->", re.S)
+
+
+ESTIMATE_PIECE = re.compile(r"\w+|[^\w\s]")
+NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+
+def estimate(text):
+    """Roughly one token per 4 ASCII characters of a word and one per symbol.
+    BPE vocabularies split non-ASCII text (Hangul, CJK) into at least one
+    token per character, so those count one each."""
+    total = 0
+    for piece in ESTIMATE_PIECE.findall(text):
+        wide = len(NON_ASCII.findall(piece))
+        total += max(1, wide + (len(piece) - wide + 3) // 4)
+    return total
+
+
+class TokenCounter:
+    """cl100k_base via tiktoken, loaded on first use; falls back to
+    ``estimate`` when tiktoken is missing or its encoding cannot be loaded
+    (it is downloaded on first use, which fails offline)."""
+
+    def __init__(self):
+        try:
+            import tiktoken
+        except ImportError:
+            self.tiktoken = None
+            self.name = "estimate"
+            warn("tiktoken is not installed")
+        else:
+            self.tiktoken = tiktoken
+            self.name = "cl100k_base"
+        self.encoding = None
+
+    def __call__(self, text):
+        if self.name == "cl100k_base" and self.encoding is None:
+            try:
+                self.encoding = self.tiktoken.get_encoding("cl100k_base")
+            except Exception as error:  # noqa: BLE001 - network, cache and parse errors alike
+                self.name = "estimate"
+                warn(f"cannot load cl100k_base ({type(error).__name__}: {error})")
+        if self.encoding is None:
+            return estimate(text)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def warn(reason):
+    print(f"⚠️  {reason}: token counts are estimates (pip install tiktoken for exact counts)", file=sys.stderr)
+
+
+def normalize(line):
+    line = re.sub(r"^\s*(?:[-*+>]|\d+\.|#{1,6})\s*", "", line)
+    return re.sub(r"\s+", " ", line).strip().lower()
+
+
+def sections(text):
+    """Split markdown into (heading, body) pairs; text before the first
+    heading is reported as "(preamble)"."""
+    result = [["(preamble)", []]]
+    in_code = False
+    for line in text.splitlines(keepends=True):
+        if CODE_FENCE.match(line):
+            in_code = not in_code
+        match = None if in_code else HEADING.match(line)
+        if match:
+            result.append([match.group(2).strip(), []])
+        result[-1][1].append(line)
+    return [(heading, "".join(lines)) for heading, lines in result if "".join(lines).strip()]
+
+
+class Analyzer:
+    """Per-file token counts, sections and duplicate keys, cached by hash."""
+
+    def __init__(self, root, cache_path):
+        self.root = root
+        self.cache_path = cache_path
+        self.count = TokenCounter()
+        self.counter_name = self.count.name
+        self.cache = self._load_cache()
+        self.dirty = False
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as handle:
+                cache = json.load(handle)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CACHE_VERSION or cache.get("counter") != self.counter_name:
+            return {}
+        return cache.get("files", {})
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        data = {"version": CACHE_VERSION, "counter": self.counter_name, "files": self.cache}
+        tmp = f"{self.cache_path}.{os.getpid()}"
+        with open(tmp, "w") as handle:
+            json.dump(data, handle, separators=(",", ":"))
+        os.replace(tmp, self.cache_path)
+
+    def analyze(self, path):
+        with open(path, "rb") as handle:
+            raw = handle.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        rel = os.path.relpath(path, self.root)
+        cached = self.cache.get(rel)
+        if cached and cached["sha256"] == digest:
+            return cached
+        text = raw.decode("utf-8", errors="replace")
+        tokens = self.count(text)
+        if self.count.name != self.counter_name:
+            # The encoding failed to load: cached counts are no longer comparable
+            self.counter_name = self.count.name
+            self.cache = {}
+        result = {
+            "sha256": digest,
+            "tokens": tokens,
+            "sections": [[heading, self.count(body)] for heading, body in sections(text)],
+            "references": REFERENCE.findall(HTML_COMMENT.sub("", text)),
+            "lines": sorted({
+                key for key in (normalize(line) for line in text.splitlines())
+                if len(key) >= MIN_DUPLICATE_CHARS
+            }),
+        }
+        self.cache[rel] = result
+        self.dirty = True
+        return result
+
+
+def resolve_references(analyzer, entry):
+    """Files loaded with ``entry``, in load order, following @references
+    relative to the referencing file."""
+    loaded, missing = [], []
+
+    def visit(path, depth):
+        if path in loaded or depth > MAX_IMPORT_DEPTH:
+            return
+        loaded.append(path)
+        for reference in analyzer.analyze(path)["references"]:
+            target = os.path.normpath(os.path.join(os.path.dirname(path), os.path.expanduser(reference)))
+            if os.path.isfile(target):
+                visit(target, depth + 1)
+            else:
+                missing.append((os.path.relpath(path, analyzer.root), reference))
+
+    visit(entry, 0)
+    return loaded, missing
+
+
+def find_duplicates(analyzer, paths):
+    """Normalized lines that appear in more than one file."""
+    owners = {}
+    for path in paths:
+        for key in analyzer.analyze(path)["lines"]:
+            owners.setdefault(key, []).append(os.path.relpath(path, analyzer.root))
+    return {key: files for key, files in owners.items() if len(files) > 1}
+
+
+def minimize(text):
+    text = HTML_COMMENT.sub("", text)
+    lines = [line.rstrip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+
+def write_bundle(analyzer, loaded, output):
+    """Inline the loaded files into one minimized document, dropping lines
+    already emitted by an earlier file."""
+    seen = set()
+    parts = []
+    for path in loaded:
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            text = minimize(handle.read())
+        kept, in_code = [], False
+        for line in text.splitlines():
+            if CODE_FENCE.match(line):
+                in_code = not in_code
+            key = normalize(line)
+            if not in_code and len(key) >= MIN_DUPLICATE_CHARS:
+                if key in seen:
+                    continue
+                seen.add(key)
+            # References are inlined by the bundle itself
+            kept.append(line if in_code else REFERENCE.sub(lambda m: m.group(1), line))
+        parts.append("\n".join(kept).strip())
+    bundle = "\n\n".join(part for part in parts if part) + "\n"
+    with open(output, "w", encoding="utf-8") as handle:
+        handle.write(bundle)
+    return analyzer.count(bundle)
+
+
+def parse_budgets(values):
+    budgets = dict(DEFAULT_BUDGETS)
+    for value in values:
+        name, _, tokens = value.partition("=")
+        if not tokens.isdigit():
+            raise SystemExit(f"invalid --budget {value!r}, expected FILE=TOKENS")
+        budgets[name] = int(tokens)
+    return budgets
+
+
+def main(argv):
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Check the token budget of CLAUDE.md and its @references.")
+    parser.add_argument("--root", default=here, help="the .claude directory (default: %(default)s)")
+    parser.add_argument("--budget", action="append", default=[], metavar="FILE=TOKENS",
+                        help="per-file budget, relative to --root (default: CLAUDE.md=500)")
+    parser.add_argument("--total", type=int, help="budget for CLAUDE.md plus everything it loads")
+    parser.add_argument("--sections", action="store_true", help="show per-section token counts")
+    parser.add_argument("--fail-on-duplicates", action="store_true", help="treat duplicated lines as errors")
+    parser.add_argument("--bundle", metavar="OUT", help="write a minimized, inlined bundle to OUT")
+    args = parser.parse_args(argv)
+
+    root = os.path.abspath(args.root)
+    entry = os.path.join(root, "CLAUDE.md")
+    if not os.path.isfile(entry):
+        print(f"❌ {entry} not found", file=sys.stderr)
+        return 2
+    budgets = parse_budgets(args.budget)
+    analyzer = Analyzer(root, os.path.join(root, ".cache", "context-budget.json"))
+
+    loaded, missing = resolve_references(analyzer, entry)
+    checked = list(loaded)
+    for path in sorted(glob.glob(os.path.join(root, "commands", "*.md"))):
+        if path not in checked:
+            checked.append(path)
+
+    failures = []
+    total = 0
+    print(f"📏 Context budget ({analyzer.counter_name} tokens)")
+    for path in loaded:
+        rel = os.path.relpath(path, root)
+        result = analyzer.analyze(path)
+        total += result["tokens"]
+        budget = budgets.get(rel)
+        marker = ""
+        if budget is not None:
+            marker = f" / {budget}"
+            if result["tokens"] > budget:
+                marker += "  ❌ over budget"
+                failures.append(f"{rel}: {result['tokens']} > {budget}")
+        print(f"  {rel:<28} {result['tokens']:>6}{marker}")
+        if args.sections:
+            for heading, tokens in result["sections"]:
+                print(f"      {heading[:40]:<40} {tokens:>6}")
+    print(f"  {'total loaded per turn':<28} {total:>6}" + (f" / {args.total}" if args.total else ""))
+    if args.total and total > args.total:
+        failures.append(f"total: {total} > {args.total}")
+
+    for source, reference in missing:
+        print(f"⚠️  {source}: @{reference} not found")
+
+    duplicates = find_duplicates(analyzer, checked)
+    if duplicates:
+        wasted = sum(analyzer.count(key) * (len(files) - 1) for key, files in duplicates.items())
+        print(f"⚠️  {len(duplicates)} duplicated lines (~{wasted} tokens):")
+        for key, files in sorted(duplicates.items(), key=lambda item: item[1]):
+            print(f"    {', '.join(files)}: {key[:70]}")
+        if args.fail_on_duplicates:
+            failures.append(f"{len(duplicates)} duplicated lines")
+
+    if args.bundle:
+        tokens = write_bundle(analyzer, loaded, args.bundle)
+        print(f"📦 Bundle written to {args.bundle}: {tokens} tokens (from {total})")
+
+    analyzer.save()
+    if failures:
+        print("❌ Context budget exceeded: " + "; ".join(failures), file=sys.stderr)
+        return 1
+    print("✅ Within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
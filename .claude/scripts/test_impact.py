@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Test-impact selection for the /verify and /tcr commands.
+
+Keeps an import-graph index (.claude/.cache/test-impact.json) mapping source
+files to the tests that reach them, and runs only the tests affected by the
+current diff. Files are re-parsed only when their size or mtime changed. The
+full suite runs instead when there is no usable index, a project-wide file
+(package.json, tsconfig, conftest.py, ...) changed, or a changed file that can
+affect tests is not in the graph: modules nothing imports, fixture and asset
+files (JSON, snapshots, CSS, .vue, SQL, ...) anywhere, and any other file in a
+directory holding sources or tests. Selecting nothing there would let a
+breaking change pass. Docs, .claude/ and scratch files never force it; the
+ignore globs can be replaced with CLAUDE_TEST_IMPACT_IGNORE (space-separated)
+and extended with --ignore.
+
+Usage:
+    test_impact.py select [--base REF] [--ignore GLOB]... [--json]
+    test_impact.py run [--base REF] [--ignore GLOB]... -- <test command>
+    test_impact.py build
+
+Examples:
+    test_impact.py run -- npx vitest run
+    test_impact.py run -- python -m pytest -q
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+INDEX_VERSION = 1
+INDEX_PATH = os.path.join(".claude", ".cache", "test-impact.json")
+
+JS_EXTENSIONS = (".ts", ".tsx", ".mts", ".cts", ".js", ".jsx", ".mjs", ".cjs")
+PY_EXTENSIONS = (".py",)
+SOURCE_EXTENSIONS = JS_EXTENSIONS + PY_EXTENSIONS
+
+# Changes to these affect every test, so selection falls back to the full suite
+GLOBAL_FILES = re.compile(
+    r"(^|/)(package\.json|package-lock\.json|pnpm-lock\.yaml|yarn\.lock|bun\.lockb"
+    r"|tsconfig[^/]*\.json|(jest|vitest|vite|babel)\.config\.[^/]+|\.babelrc"
+    r"|pyproject\.toml|setup\.cfg|setup\.py|pytest\.ini|tox\.ini|conftest\.py"
+    r"|requirements[^/]*\.txt)$"
+)
+# Non-source files tests commonly read, wherever they live
+ASSET_EXTENSIONS = (
+    ".json", ".jsonc", ".json5", ".snap", ".css", ".scss", ".sass", ".less", ".vue", ".svelte",
+    ".astro", ".html", ".sql", ".graphql", ".gql", ".yaml", ".yml", ".toml", ".csv", ".xml", ".svg",
+)
+# Changed files matching these never force the full suite ('*' also matches '/')
+DEFAULT_IGNORE = (
+    "*.md", "*.mdx", "*.rst", "*.adoc", "LICENSE*", "CHANGELOG*", ".gitignore", ".gitattributes",
+    ".editorconfig", "docs/*", "doc/*", ".claude/*", ".github/*", ".vscode/*", ".idea/*",
+    "*.log", "*.tmp", "*.swp", "*~",
+)
+TEST_FILE = re.compile(
+    r"(\.(test|spec)\.[cm]?[jt]sx?$)|(^|/)__tests__/|(^|/)test_[^/]*\.py$|_test\.py$"
+)
+
+JS_IMPORT = re.compile(
+    r"""(?:\bimport\s*(?:[\w*{}\s,$]+\s*from\s*)?|\bexport\s*[\w*{}\s,$]*\s*from\s*"""
+    r"""|\brequire\s*\(\s*|\bimport\s*\(\s*)['"]([^'"]+)['"]"""
+)
+PY_IMPORT = re.compile(r"^\s*(?:from\s+(\.*[\w.]*)\s+import\s+([\w., ]+)|import\s+([\w., ]+))", re.M)
+
+
+def git(*args):
+    result = subprocess.run(["git", *args], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return result.stdout
+
+
+def is_test(path):
+    return path.endswith(SOURCE_EXTENSIONS) and bool(TEST_FILE.search(path))
+
+
+def list_sources():
+    """Tracked and untracked, non-ignored source files."""
+    output = git("ls-files", "-z", "--cached", "--others", "--exclude-standard")
+    return sorted({p for p in output.split("\0") if p.endswith(SOURCE_EXTENSIONS) and os.path.isfile(p)})
+
+
+def signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def resolve_js(importer, spec, files):
+    if not spec.startswith("."):
+        return None
+    base = os.path.normpath(os.path.join(os.path.dirname(importer), spec))
+    stem, extension = os.path.splitext(base)
+    candidates = [base]
+    if extension in (".js", ".jsx", ".mjs", ".cjs"):
+        # TypeScript sources are imported with the emitted .js extension
+        candidates += [stem + ext for ext in JS_EXTENSIONS]
+    candidates += [base + ext for ext in JS_EXTENSIONS]
+    candidates += [os.path.join(base, "index" + ext) for ext in JS_EXTENSIONS]
+    return next((c for c in candidates if c in files), None)
+
+
+def resolve_py(importer, module, files):
+    if module.startswith("."):
+        level = len(module) - len(module.lstrip("."))
+        package = os.path.dirname(importer)
+        for _ in range(level - 1):
+            package = os.path.dirname(package)
+        parts = [package] + module.lstrip(".").split(".") if module.strip(".") else [package]
+        base = os.path.join(*[p for p in parts if p])
+        roots = [""]
+    else:
+        base = module.replace(".", "/")
+        roots = ["", "src/"]
+    for root in roots:
+        for candidate in (f"{root}{base}.py", f"{root}{base}/__init__.py"):
+            if candidate in files:
+                return candidate
+    return None
+
+
+def parse_imports(path):
+    """Import specifiers of ``path`` as written: JS module paths or Python
+    module names. They are resolved against the file list on every run, so
+    adding or removing a file never requires re-parsing its importers."""
+    try:
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            text = handle.read()
+    except OSError:
+        return []
+    if path.endswith(JS_EXTENSIONS):
+        return sorted({spec for spec in JS_IMPORT.findall(text) if spec.startswith(".")})
+    modules = set()
+    for match in PY_IMPORT.finditer(text):
+        source, names, plain = match.groups()
+        if plain:
+            modules.update(name.split(" as ")[0].strip() for name in plain.split(","))
+        elif source is not None:
+            modules.add(source)
+            # "from pkg import module" may name submodules
+            prefix = source if source.endswith(".") else source + "."
+            modules.update(prefix + name.split(" as ")[0].strip() for name in names.split(","))
+    return sorted(module for module in modules if module)
+
+
+def resolve(path, spec, files):
+    if path.endswith(JS_EXTENSIONS):
+        return resolve_js(path, spec, files)
+    return resolve_py(path, spec, files)
+
+
+def load_index():
+    try:
+        with open(INDEX_PATH) as handle:
+            index = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    return index if index.get("version") == INDEX_VERSION else None
+
+
+def save_index(index):
+    os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
+    tmp = f"{INDEX_PATH}.{os.getpid()}"
+    with open(tmp, "w") as handle:
+        json.dump(index, handle, separators=(",", ":"))
+    os.replace(tmp, INDEX_PATH)
+
+
+def refresh_index(index):
+    """Re-parse files whose signature changed. Returns (index, reparsed count)."""
+    old = (index or {}).get("files", {})
+    new = {}
+    reparsed = 0
+    for path in list_sources():
+        sig = signature(path)
+        entry = old.get(path)
+        if not entry or entry["sig"] != sig:
+            entry = {"sig": sig, "imports": parse_imports(path)}
+            reparsed += 1
+        new[path] = entry
+    return {"version": INDEX_VERSION, "files": new}, reparsed
+
+
+def add_dependents(reverse, index_files, files):
+    """Add "imported file -> importers" edges of ``index_files`` to ``reverse``."""
+    for path, entry in index_files.items():
+        for spec in entry["imports"]:
+            target = resolve(path, spec, files)
+            if target and target != path:
+                reverse.setdefault(target, set()).add(path)
+
+
+def ignore_patterns(extra):
+    configured = os.environ.get("CLAUDE_TEST_IMPACT_IGNORE")
+    return (tuple(configured.split()) if configured is not None else DEFAULT_IGNORE) + tuple(extra)
+
+
+def affects_tests(path, reverse, source_dirs):
+    """Whether a changed file missing from the graph may still change test results."""
+    if path.endswith(SOURCE_EXTENSIONS):
+        return path not in reverse
+    return path.endswith(ASSET_EXTENSIONS) or os.path.dirname(path) in source_dirs
+
+
+def changed_files(base):
+    changed = git("diff", "--name-only", "-z", "--no-renames", base).split("\0")
+    changed += git("ls-files", "-z", "--others", "--exclude-standard").split("\0")
+    cache_dir = os.path.dirname(INDEX_PATH) + "/"
+    return sorted({path for path in changed if path and not path.startswith(cache_dir)})
+
+
+def select(base, ignore=()):
+    """Returns (tests or None for the full suite, reason, stats dict)."""
+    started = time.monotonic()
+    previous = load_index()
+    index, reparsed = refresh_index(previous)
+    save_index(index)
+    changed = changed_files(base)
+    stats = {"changed": len(changed), "reparsed": reparsed}
+
+    def done(tests, reason):
+        stats["selection_ms"] = round((time.monotonic() - started) * 1000, 1)
+        stats["selected"] = None if tests is None else len(tests)
+        return tests, reason, stats
+
+    if previous is None:
+        return done(None, "no index yet")
+    global_changes = [path for path in changed if GLOBAL_FILES.search(path)]
+    if global_changes:
+        return done(None, f"project-wide file changed: {global_changes[0]}")
+
+    # Walk the union of old and new edges so deleted files and imports still count
+    reverse = {}
+    add_dependents(reverse, previous["files"], set(previous["files"]))
+    add_dependents(reverse, index["files"], set(index["files"]))
+    # Directories holding sources or tests, at any depth below the root
+    source_dirs = set()
+    for path in index["files"]:
+        path = os.path.dirname(path)
+        while path and path not in source_dirs:
+            source_dirs.add(path)
+            path = os.path.dirname(path)
+    patterns = ignore_patterns(ignore)
+    unindexed = [
+        path
+        for path in changed
+        if not is_test(path)
+        and not any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+        and affects_tests(path, reverse, source_dirs)
+    ]
+    if unindexed:
+        return done(None, f"unindexed file changed: {unindexed[0]}")
+    seen = set()
+    queue = [path for path in changed if path.endswith(SOURCE_EXTENSIONS)]
+    while queue:
+        path = queue.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        queue.extend(reverse.get(path, ()))
+    tests = sorted(path for path in seen if is_test(path) and os.path.isfile(path))
+    return done(tests, "impact")
+
+
+def report(tests, reason, stats):
+    if tests is None:
+        summary = f"full suite ({reason})"
+    else:
+        summary = f"{len(tests)} affected tests from {stats['changed']} changed files"
+    print(
+        f"🎯 {summary}; selection {stats['selection_ms']}ms, {stats['reparsed']} files re-parsed",
+        file=sys.stderr,
+    )
+
+
+def command_select(args):
+    tests, reason, stats = select(args.base, args.ignore)
+    if args.json:
+        print(json.dumps({"full": tests is None, "reason": reason, "tests": tests or [], **stats}))
+    else:
+        report(tests, reason, stats)
+        for test in tests or []:
+            print(test)
+    return 0
+
+
+def command_run(args):
+    if not args.command:
+        print("test_impact.py run: missing test command after --", file=sys.stderr)
+        return 2
+    tests, reason, stats = select(args.base, args.ignore)
+    report(tests, reason, stats)
+    if tests == []:
+        print("✅ No affected tests", file=sys.stderr)
+        return 0
+    started = time.monotonic()
+    result = subprocess.run(args.command + (tests or []))
+    elapsed = time.monotonic() - started
+    print(
+        f"⏱️  selection {stats['selection_ms']}ms, tests {elapsed:.2f}s (exit {result.returncode})",
+        file=sys.stderr,
+    )
+    return result.returncode
+
+
+def command_build(args):
+    started = time.monotonic()
+    index, _ = refresh_index(None)
+    save_index(index)
+    tests = sum(1 for path in index["files"] if is_test(path))
+    print(
+        f"📇 Indexed {len(index['files'])} files ({tests} tests) in "
+        f"{(time.monotonic() - started) * 1000:.0f}ms",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Run only the tests affected by the current diff.")
+    commands = parser.add_subparsers(dest="action", required=True)
+    for name in ("select", "run"):
+        sub = commands.add_parser(name)
+        sub.add_argument("--base", default="HEAD", help="diff base (default: HEAD)")
+        sub.add_argument(
+            "--ignore", action="append", default=[], metavar="GLOB",
+            help="changed files that never force the full suite (repeatable)",
+        )
+        if name == "select":
+            sub.add_argument("--json", action="store_true", help="print one JSON object")
+        else:
+            sub.add_argument("command", nargs=argparse.REMAINDER, help="test command")
+    commands.add_parser("build")
+    args = parser.parse_args(argv)
+    if getattr(args, "command", None) and args.command[0] == "--":
+        args.command = args.command[1:]
+
+    os.chdir(git("rev-parse", "--show-toplevel").strip())
+    handler = {"select": command_select, "run": command_run, "build": command_build}[args.action]
+    return handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""Benchmarks for setup.sh and the hooks, checked against stored baselines.
+
+Every scenario runs in a throwaway HOME, backup store and runtime directory,
+with the stubs in bench/stubs (a no-op Biome) first on PATH and the stub TTS
+backend, so the numbers measure this template's own overhead and nothing on
+the machine is touched. Each scenario is timed end to end as a subprocess,
+like Claude or git would run it, and reported as p50/p95/p99 wall time.
+
+A run fails (exit 1) when a scenario's p50 or p95 exceeds its baseline in
+bench/baselines.json by more than --tolerance plus --slack-ms on two
+consecutive measurements. Baselines are machine-specific: refresh them with
+--update-baseline on the machine that runs the check.
+
+Usage:
+    bench/run.py [--iterations N] [--warmup N] [--only NAME]... [--list]
+                 [--tolerance RATIO] [--slack-ms MS] [--update-baseline] [--json]
+"""
+
+import argparse
+import fcntl
+import glob
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+HOOKS_DIR = os.path.join(REPO_DIR, ".claude", "hooks")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baselines.json")
+
+MANY_BACKUPS = 100
+PRECOMMIT_FILES = 200
+BATCH_PROJECTS = 8
+VOICE_WORKER_TIMEOUT = 10
+CHECKED = ("p50", "p95")
+
+
+def run(command, cwd, env, stdin=b""):
+    result = subprocess.run(
+        command, cwd=cwd, env=env, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(command)} exited {result.returncode}: {result.stderr.decode().strip()}")
+
+
+class Scenario:
+    """One benchmarked command. ``prepare`` runs once, ``reset`` before
+    every iteration; neither is timed."""
+
+    name = ""
+    description = ""
+    stdin = b""
+
+    def __init__(self, workdir, env):
+        self.workdir = workdir
+        self.env = dict(env)
+        self.cwd = os.path.join(workdir, "project")
+        os.makedirs(self.cwd)
+
+    def prepare(self):
+        pass
+
+    def reset(self, iteration):
+        pass
+
+    def command(self):
+        raise NotImplementedError
+
+    def setup_sh(self, *args):
+        run(["bash", os.path.join(REPO_DIR, "setup.sh"), *args], self.cwd, self.env)
+
+
+class SetupEmpty(Scenario):
+    name = "setup-empty"
+    description = "setup.sh into a project without .claude"
+
+    def reset(self, iteration):
+        shutil.rmtree(os.path.join(self.cwd, ".claude"), ignore_errors=True)
+
+    def command(self):
+        return ["bash", os.path.join(REPO_DIR, "setup.sh")]
+
+
+class SetupExisting(Scenario):
+    name = "setup-existing"
+    description = "setup.sh over an edited .claude (snapshot, then reinstall)"
+
+    def prepare(self):
+        self.setup_sh()
+
+    def reset(self, iteration):
+        # A local edit every time, so each run takes a real snapshot
+        with open(os.path.join(self.cwd, ".claude", "notes.md"), "w") as handle:
+            handle.write(f"local notes {iteration}\n")
+
+    def command(self):
+        return ["bash", os.path.join(REPO_DIR, "setup.sh")]
+
+
+class SetupManyBackups(SetupExisting):
+    name = "setup-many-backups"
+    description = f"setup.sh over an edited .claude with {MANY_BACKUPS} retained snapshots"
+
+    def prepare(self):
+        self.env["CLAUDE_TEMPLATE_BACKUP_KEEP"] = "0"
+        self.setup_sh()
+        self.setup_sh("backup", "create")
+        root = os.path.realpath(self.cwd)
+        for project in glob.glob(os.path.join(self.env["CLAUDE_TEMPLATE_STORE"], "backups", "projects", "*")):
+            with open(os.path.join(project, "root")) as handle:
+                if os.path.realpath(handle.read().strip()) != root:
+                    continue
+            snapshot = max(name for name in os.listdir(project) if name[:1].isdigit())
+            for index in range(MANY_BACKUPS - 1):
+                old_id = time.strftime("%Y%m%d_%H%M%S", time.gmtime(1577836800 + index * 3600))
+                shutil.copy(os.path.join(project, snapshot), os.path.join(project, old_id))
+
+
+class SyncNoop(Scenario):
+    name = "sync-noop"
+    description = "setup.sh sync with nothing to change (fingerprint fast path)"
+
+    def prepare(self):
+        self.setup_sh()
+
+    def command(self):
+        return ["bash", os.path.join(REPO_DIR, "setup.sh"), "sync"]
+
+
+class SyncEdited(Scenario):
+    name = "sync-edited"
+    description = "setup.sh sync after the template manifest went stale"
+
+    def prepare(self):
+        self.setup_sh()
+
+    def reset(self, iteration):
+        # Forget the fingerprint so sync has to hash and plan every file
+        manifest = os.path.join(self.cwd, ".claude", ".template-manifest")
+        with open(manifest) as handle:
+            lines = [line for line in handle if not line.startswith("# fingerprint")]
+        with open(manifest, "w") as handle:
+            handle.writelines(lines)
+
+    def command(self):
+        return ["bash", os.path.join(REPO_DIR, "setup.sh"), "sync"]
+
+
+class Batch(Scenario):
+    name = f"batch-{BATCH_PROJECTS}"
+    description = f"setup.sh batch over {BATCH_PROJECTS} fresh projects"
+
+    def reset(self, iteration):
+        for index in range(BATCH_PROJECTS):
+            project = os.path.join(self.cwd, f"p{index}")
+            shutil.rmtree(project, ignore_errors=True)
+            os.makedirs(project)
+
+    def command(self):
+        return ["bash", os.path.join(REPO_DIR, "setup.sh"), "batch", "--glob", os.path.join(self.cwd, "p*")]
+
+
+class BiomePostWrite(Scenario):
+    name = "biome-post-write"
+    description = "Biome post-write hook, queued to the formatter worker"
+    sync = False
+
+    def prepare(self):
+        os.makedirs(os.path.join(self.cwd, "src"))
+        with open(os.path.join(self.cwd, "src", "app.ts"), "w") as handle:
+            handle.write("export const answer = 42;\n")
+        self.stdin = json.dumps({"cwd": self.cwd, "tool_input": {"file_path": "src/app.ts"}}).encode()
+        if self.sync:
+            self.env["CLAUDE_BIOME_SYNC"] = "1"
+
+    def command(self):
+        return [os.path.join(HOOKS_DIR, "biome", "post-write.sh")]
+
+
+class BiomePostWriteSync(BiomePostWrite):
+    name = "biome-post-write-sync"
+    description = "Biome post-write hook waiting for the (stub) format"
+    sync = True
+
+
+class PreCommit(Scenario):
+    name = "pre-commit-cold"
+    description = f"pre-commit Biome check of {PRECOMMIT_FILES} staged files, no cache"
+
+    def prepare(self):
+        run(["git", "init", "-q"], self.cwd, self.env)
+        with open(os.path.join(self.cwd, "biome.json"), "w") as handle:
+            handle.write("{}\n")
+        os.makedirs(os.path.join(self.cwd, "src"))
+        for index in range(PRECOMMIT_FILES):
+            with open(os.path.join(self.cwd, "src", f"module{index}.ts"), "w") as handle:
+                handle.write(f"export const value{index} = {index};\n")
+        run(["git", "add", "-A"], self.cwd, self.env)
+        self.env["BIOME_PRECOMMIT_CACHE"] = "0"
+
+    def command(self):
+        return [os.path.join(HOOKS_DIR, "pre-commit")]
+
+
+class PreCommitCached(PreCommit):
+    name = "pre-commit-cached"
+    description = f"pre-commit Biome check of {PRECOMMIT_FILES} staged files, all cached"
+
+    def prepare(self):
+        super().prepare()
+        del self.env["BIOME_PRECOMMIT_CACHE"]
+        run(self.command(), self.cwd, self.env)
+
+
+class VoicePostTask(Scenario):
+    name = "voice-post-task"
+    description = "voice post-task hook with the stub TTS backend"
+    stdin = b"{}"
+    trace = False
+
+    def prepare(self):
+        self.env["CLAUDE_VOICE_BACKEND"] = "stub"
+        self.env["CLAUDE_VOICE_COALESCE_MS"] = "50"
+        self.env["CLAUDE_VOICE_STUB_LOG"] = os.path.join(self.workdir, "voice.log")
+        if self.trace:
+            self.env["CLAUDE_HOOK_TRACE"] = os.path.join(self.workdir, "trace.jsonl")
+        self.runtime = os.path.join(self.env["XDG_RUNTIME_DIR"], f"claude-voice-{os.getuid()}")
+
+    def reset(self, iteration):
+        # Wait for the previous run's worker to drain the queue and exit, so
+        # every run takes the same path (enqueue, start a worker) on an idle CPU
+        deadline = time.monotonic() + VOICE_WORKER_TIMEOUT
+        while not self.worker_idle():
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"voice worker still running after {VOICE_WORKER_TIMEOUT}s")
+            time.sleep(0.01)
+
+    def worker_idle(self):
+        if glob.glob(os.path.join(self.runtime, "queue", "*.msg")):
+            return False
+        try:
+            with open(os.path.join(self.runtime, "worker.lock"), "a") as handle:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except FileNotFoundError:
+            return True
+        except OSError:
+            return False
+        # The lock is released before the interpreter shuts down
+        return not process_alive(self.last_player())
+
+    def last_player(self):
+        try:
+            with open(self.env["CLAUDE_VOICE_STUB_LOG"]) as handle:
+                lines = handle.read().splitlines()
+        except OSError:
+            return None
+        return json.loads(lines[-1])["pid"] if lines else None
+
+    def command(self):
+        return [os.path.join(HOOKS_DIR, "voice_notifications", "post-task.sh")]
+
+
+class VoicePostTaskTraced(VoicePostTask):
+    name = "voice-post-task-traced"
+    description = "voice post-task hook under CLAUDE_HOOK_TRACE (wrapper overhead)"
+    trace = True
+
+
+SCENARIOS = [
+    SetupEmpty,
+    SetupExisting,
+    SetupManyBackups,
+    SyncNoop,
+    SyncEdited,
+    Batch,
+    BiomePostWrite,
+    BiomePostWriteSync,
+    PreCommit,
+    PreCommitCached,
+    VoicePostTask,
+    VoicePostTaskTraced,
+]
+
+
+def isolated_env(workdir):
+    env = {
+        key: value for key, value in os.environ.items()
+        if not key.startswith(("CLAUDE_", "BIOME_PRECOMMIT_", "GIT_"))
+    }
+    for name in ("home", "run", "cache"):
+        os.makedirs(os.path.join(workdir, name))
+    env.update({
+        "HOME": os.path.join(workdir, "home"),
+        "XDG_RUNTIME_DIR": os.path.join(workdir, "run"),
+        "XDG_CACHE_HOME": os.path.join(workdir, "cache"),
+        "CLAUDE_TEMPLATE_STORE": os.path.join(workdir, "store"),
+        "CLAUDE_BIOME_IDLE_SECONDS": "2",
+        "GIT_CONFIG_NOSYSTEM": "1",
+        "GIT_AUTHOR_NAME": "bench",
+        "GIT_AUTHOR_EMAIL": "bench@example.com",
+        "GIT_COMMITTER_NAME": "bench",
+        "GIT_COMMITTER_EMAIL": "bench@example.com",
+        "PATH": os.path.join(BENCH_DIR, "stubs") + os.pathsep + os.environ.get("PATH", ""),
+    })
+    return env
+
+
+def process_alive(pid):
+    """Whether ``pid`` is running (zombies waiting for a reaper count as exited)."""
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as handle:
+            return handle.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile."""
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(cls, iterations, warmup):
+    workdir = tempfile.mkdtemp(prefix=f"claude-bench-{cls.name}-")
+    try:
+        scenario = cls(workdir, isolated_env(workdir))
+        scenario.prepare()
+        samples = []
+        for iteration in range(warmup + iterations):
+            scenario.reset(iteration)
+            command = scenario.command()
+            started = time.perf_counter()
+            result = subprocess.run(
+                command, cwd=scenario.cwd, env=scenario.env, input=scenario.stdin,
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            )
+            elapsed = (time.perf_counter() - started) * 1000
+            if result.returncode != 0:
+                raise RuntimeError(f"exited {result.returncode}: {result.stderr.decode().strip()}")
+            if iteration >= warmup:
+                samples.append(elapsed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    samples.sort()
+    return {
+        "p50": round(percentile(samples, 50), 2),
+        "p95": round(percentile(samples, 95), 2),
+        "p99": round(percentile(samples, 99), 2),
+        "max": round(samples[-1], 2),
+        "n": len(samples),
+    }
+
+
+def load_baselines():
+    try:
+        with open(BASELINE_PATH) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {"scenarios": {}}
+
+
+def save_baselines(results, iterations):
+    scenarios = load_baselines().get("scenarios", {})
+    for name, stats in results.items():
+        scenarios[name] = {key: stats[key] for key in ("p50", "p95", "p99")}
+    data = {
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "iterations": iterations,
+        "scenarios": dict(sorted(scenarios.items())),
+    }
+    with open(BASELINE_PATH, "w") as handle:
+        json.dump(data, handle, indent=2)
+        handle.write("\n")
+
+
+def regressions(name, stats, baseline, tolerance, slack_ms):
+    found = []
+    for key in CHECKED:
+        if key in baseline:
+            limit = baseline[key] * (1 + tolerance) + slack_ms
+            if stats[key] > limit:
+                found.append(f"{name}: {key} {stats[key]:.1f}ms > {limit:.1f}ms (baseline {baseline[key]:.1f}ms)")
+    return found
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Benchmark setup.sh and the hooks against stored baselines.")
+    parser.add_argument("--iterations", type=int, default=20, help="timed runs per scenario (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs first (default: %(default)s)")
+    parser.add_argument("--only", action="append", default=[], metavar="NAME", help="run only these scenarios")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown ratio over the baseline (default: %(default)s)")
+    parser.add_argument("--slack-ms", type=float, default=20,
+                        help="absolute allowance on top of --tolerance (default: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the baselines")
+    parser.add_argument("--json", action="store_true", help="print results as one JSON object")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for cls in SCENARIOS:
+            print(f"{cls.name:<24} {cls.description}")
+        return 0
+    unknown = set(args.only) - {cls.name for cls in SCENARIOS}
+    if unknown:
+        print(f"❌ Unknown scenario: {', '.join(sorted(unknown))} (see --list)", file=sys.stderr)
+        return 2
+    selected = [cls for cls in SCENARIOS if not args.only or cls.name in args.only]
+
+    baselines = load_baselines().get("scenarios", {})
+    results, failures, errors = {}, [], []
+    if not args.json:
+        print(f"⏱️  {args.iterations} runs per scenario, wall time in ms")
+        print(f"  {'scenario':<24} {'p50':>8} {'p95':>8} {'p99':>8} {'base p95':>9}")
+    for cls in selected:
+        try:
+            stats = measure(cls, args.iterations, args.warmup)
+        except (OSError, RuntimeError) as error:
+            errors.append(f"{cls.name}: {error}")
+            if not args.json:
+                print(f"  {cls.name:<24} ❌ {error}")
+            continue
+        baseline = baselines.get(cls.name, {})
+        found = [] if args.update_baseline else regressions(
+            cls.name, stats, baseline, args.tolerance, args.slack_ms
+        )
+        if found:
+            # Confirm on a second run so one noisy burst does not fail the check
+            stats = measure(cls, args.iterations, args.warmup)
+            found = regressions(cls.name, stats, baseline, args.tolerance, args.slack_ms)
+        results[cls.name] = stats
+        failures += found
+        if not args.json:
+            base = f"{baseline['p95']:>9.1f}" if "p95" in baseline else f"{'-':>9}"
+            marker = "  ❌ regression" if found else ""
+            print(f"  {cls.name:<24} {stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['p99']:>8.1f} {base}{marker}")
+
+    if args.json:
+        print(json.dumps({"results": results, "regressions": failures, "errors": errors}))
+    if args.update_baseline and results:
+        save_baselines(results, args.iterations)
+        print(f"💾 Baselines written to {os.path.relpath(BASELINE_PATH)}", file=sys.stderr)
+    if errors:
+        print("❌ Scenarios failed: " + "; ".join(errors), file=sys.stderr)
+        return 1
+    if failures:
+        print("❌ Performance regressions:\n  " + "\n  ".join(failures), file=sys.stderr)
+        return 1
+    if not args.json:
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
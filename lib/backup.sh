@@ -0,0 +1,367 @@
+# Deduplicated, compressed .claude backups for setup.sh
+#
+# Sourced by setup.sh. Snapshots live outside the project, under
+# $BACKUP_ROOT/projects/<project-key>/<id>, and list
+# "<sha256>\t<size>\t<mtime>\t<path>\t<mode>\t<ctime>\t<inode>" for every
+# file, with nanosecond times (older snapshots stop after the mode column, or
+# before it). File contents are stored once, gzip-compressed, under
+# $BACKUP_ROOT/objects/<aa>/<rest-of-sha256>.gz.
+#
+# A new snapshot only hashes files whose stat line differs from the previous
+# snapshot. As in git's racy-clean rule, a file modified at or after the time
+# the previous snapshot was written is always re-hashed: a same-size edit
+# within the filesystem's timestamp granularity would otherwise keep its
+# old hash.
+#
+# Objects are shared by all projects. Snapshot writers hold $BACKUP_ROOT/.lock
+# shared while they write objects and commit the snapshot; garbage collection
+# holds it exclusively, so it never deletes objects of a snapshot in flight.
+# Pruning only marks the store for collection, which then runs once per
+# setup.sh invocation (once per batch, not per project).
+
+BACKUP_ROOT="${CLAUDE_TEMPLATE_BACKUPS:-$STORE_DIR/backups}"
+BACKUP_KEEP="${CLAUDE_TEMPLATE_BACKUP_KEEP:-10}"
+BACKUP_MAX_AGE_DAYS="${CLAUDE_TEMPLATE_BACKUP_MAX_AGE_DAYS:-0}"
+
+backup_usage() {
+    cat << 'EOF'
+Usage: setup.sh backup <command> [options]
+
+Commands:
+  create            Snapshot the current .claude directory
+  list              List snapshots of this project
+  diff [ID]         Show changes between a snapshot (default: latest) and .claude
+  restore [ID]      Replace .claude with a snapshot (default: latest)
+  prune             Apply the retention policy and drop unused objects
+  import-legacy     Move .claude.backup.* directories into the backup store
+
+Options:
+  --keep N          Keep at most N snapshots (default: 10, 0 = unlimited)
+  --max-age DAYS    Drop snapshots older than DAYS (default: 0 = unlimited)
+EOF
+}
+
+# Backup directory for the project that owns .claude directory $1
+backup_project_dir() {
+    local root key
+    root="$(cd "$(dirname "$1")" && pwd)"
+    key="$(printf '%s' "$root" | hash_stdin | cut -c1-16)"
+    mkdir -p "$BACKUP_ROOT/projects/$key"
+    echo "$root" > "$BACKUP_ROOT/projects/$key/root"
+    echo "$BACKUP_ROOT/projects/$key"
+}
+
+# Snapshot ids sort chronologically; print them oldest first
+backup_ids() {
+    (cd "$1" && ls -1 | grep -E '^[0-9]{8}_[0-9]{6}' | LC_ALL=C sort) 2> /dev/null || true
+}
+
+backup_latest() {
+    backup_ids "$1" | tail -n 1
+}
+
+backup_object() {
+    echo "$BACKUP_ROOT/objects/${1:0:2}/${1:2}.gz"
+}
+
+# Print "<size>\t<mtime>\t<path>\t<mode>\t<ctime>\t<inode>" for every file
+# under the current directory
+stat_files() {
+    if stat --version > /dev/null 2>&1; then
+        find . \( -type f -o -type l \) -print0 \
+            | xargs -0 stat -L --printf '%s\t%.9Y\t%n\t%a\t%.9Z\t%i\n' 2> /dev/null
+    else
+        find . \( -type f -o -type l \) -print0 \
+            | xargs -0 stat -L -f '%z%t%.9Fm%t%N%t%Lp%t%.9Fc%t%i' 2> /dev/null
+    fi | sed "s|$(printf '\t')\./|$(printf '\t')|"
+}
+
+# Nanosecond mtime of file $1, in stat_files' format
+stat_mtime() {
+    stat -L --printf '%.9Y' "$1" 2> /dev/null || stat -L -f '%.9Fm' "$1"
+}
+
+# Run "$@" holding the backup store lock; $1 is -s (shared) or -x (exclusive).
+# The command runs in this shell, so set -e still applies inside it.
+backup_locked() {
+    local mode="$1" status holder
+    shift
+    mkdir -p "$BACKUP_ROOT"
+    if command -v flock > /dev/null 2>&1; then
+        {
+            flock "$mode" 9
+            "$@"
+        } 9> "$BACKUP_ROOT/.lock"
+        return
+    fi
+
+    # No flock (e.g. macOS): one exclusive mkdir lock, broken if its holder died
+    while ! mkdir "$BACKUP_ROOT/.lock.d" 2> /dev/null; do
+        holder="$(cat "$BACKUP_ROOT/.lock.d/pid" 2> /dev/null || true)"
+        if [ -n "$holder" ] && ! kill -0 "$holder" 2> /dev/null; then
+            rm -rf "$BACKUP_ROOT/.lock.d"
+            continue
+        fi
+        sleep 0.1
+    done
+    echo "$$" > "$BACKUP_ROOT/.lock.d/pid"
+    "$@"
+    status=$?
+    rm -rf "$BACKUP_ROOT/.lock.d"
+    return "$status"
+}
+
+# Snapshot directory $1. The snapshot id defaults to the current time.
+backup_create() {
+    local project
+    project="$(backup_project_dir "$1")"
+    backup_locked -s backup_write "$project" "$@"
+    backup_prune "$project"
+}
+
+# Write a snapshot of directory $2 into project backup dir $1 (id $3).
+# Runs under the shared store lock.
+backup_write() {
+    local project="$1" dir="$2" id="${3:-}" previous written="" stats reused tohash snapshot line hash obj base n=0
+    previous="$(backup_latest "$project")"
+    [ -z "$previous" ] || written="$(stat_mtime "$project/$previous")"
+    stats="$WORK_DIR/backup.stats"
+    reused="$WORK_DIR/backup.reused"
+    tohash="$WORK_DIR/backup.tohash"
+
+    (cd "$dir" && stat_files) | LC_ALL=C sort -t "$(printf '\t')" -k3 > "$stats" || true
+    : > "$reused"
+    : > "$tohash"
+
+    # Reuse hashes for files whose stat line matches the previous snapshot,
+    # unless they were modified at or after it was written (racy)
+    awk -F '\t' -v P="${previous:+$project/$previous}" -v W="$written" -v R="$reused" -v H="$tohash" '
+        # "sec.nsec" strings do not fit a double, so compare the parts
+        function racy(mtime,    m, w) {
+            split(mtime, m, "."); split(W, w, ".")
+            return m[1] + 0 > w[1] + 0 || (m[1] + 0 == w[1] + 0 && m[2] + 0 >= w[2] + 0)
+        }
+        BEGIN {
+            if (P != "") while ((getline l < P) > 0) {
+                split(l, f, "\t")
+                prev[f[2] "\t" f[3] "\t" f[4] "\t" f[5] "\t" f[6] "\t" f[7]] = f[1]
+            }
+        }
+        { if (($0 in prev) && !racy($2)) print prev[$0] "\t" $0 > R; else print $3 > H }
+    ' "$stats"
+
+    # Hash and store only the files that changed
+    snapshot="$WORK_DIR/backup.snapshot"
+    (cd "$dir" && hash_files < "$tohash") | while IFS= read -r line; do
+        hash="${line:0:64}"
+        obj="$BACKUP_ROOT/objects/${hash:0:2}/${hash:2}.gz"
+        if [ ! -f "$obj" ]; then
+            mkdir -p "$(dirname "$obj")"
+            gzip -c < "$dir/${line:66}" > "$obj.$$"
+            mv -f "$obj.$$" "$obj"
+        fi
+        echo "${line:66}"$'\t'"$hash"
+    done > "$WORK_DIR/backup.hashed"
+
+    awk -F '\t' -v R="$reused" -v S="$stats" '
+        FILENAME == ARGV[1] { h[$1] = $2; next }
+        END {
+            while ((getline l < R) > 0) print l
+            while ((getline l < S) > 0) {
+                split(l, f, "\t")
+                if (f[3] in h) print h[f[3]] "\t" l
+            }
+        }
+    ' "$WORK_DIR/backup.hashed" | LC_ALL=C sort -t "$(printf '\t')" -k4 > "$snapshot"
+
+    if [ -n "$previous" ] && [ -z "$id" ] \
+        && cmp -s <(cut -f1,4,5 "$project/$previous") <(cut -f1,4,5 "$snapshot"); then
+        # Same content: refresh its stat lines so the next run can reuse them
+        mv -f "$snapshot" "$project/$previous"
+        echo "📦 Unchanged since backup $previous"
+        return 0
+    fi
+
+    id="${id:-$(date +%Y%m%d_%H%M%S)}"
+    base="$id"
+    while [ -e "$project/$id" ]; do
+        n=$((n + 1))
+        id="$base-$n"
+    done
+    mv "$snapshot" "$project/$id"
+    echo "📦 Backup $id: $(wc -l < "$project/$id" | tr -d ' ') files, $(wc -l < "$tohash" | tr -d ' ') changed"
+}
+
+# Apply the retention policy to project backup dir $1. Objects that are no
+# longer referenced are left for backup_gc_pending. Snapshot
+# $BACKUP_PROTECT (the one being restored) is never pruned.
+backup_prune() {
+    local project="$1" ids count removed=0 id cutoff
+    ids="$(backup_ids "$project")"
+    count="$(printf '%s\n' "$ids" | grep -c . || true)"
+
+    if [ "$BACKUP_MAX_AGE_DAYS" -gt 0 ]; then
+        cutoff="$(date -d "-$BACKUP_MAX_AGE_DAYS days" +%Y%m%d_%H%M%S 2> /dev/null \
+            || date -v "-${BACKUP_MAX_AGE_DAYS}d" +%Y%m%d_%H%M%S)"
+    fi
+    for id in $ids; do
+        [ "$id" != "${BACKUP_PROTECT:-}" ] || continue
+        if { [ "$BACKUP_KEEP" -gt 0 ] && [ "$count" -gt "$BACKUP_KEEP" ]; } \
+            || { [ -n "${cutoff:-}" ] && [[ "$id" < "$cutoff" ]]; }; then
+            rm -f "$project/$id"
+            count=$((count - 1))
+            removed=$((removed + 1))
+        fi
+    done
+
+    [ "$removed" -gt 0 ] || return 0
+    echo "🧹 Pruned $removed old backups"
+    : > "$BACKUP_ROOT/.gc-pending"
+}
+
+# Delete objects that no snapshot of any project references
+backup_gc() {
+    backup_locked -x backup_collect
+}
+
+# Run backup_gc if a prune left unreferenced objects behind
+backup_gc_pending() {
+    [ -f "$BACKUP_ROOT/.gc-pending" ] || return 0
+    backup_gc
+}
+
+backup_collect() {
+    local referenced="$WORK_DIR/backup.referenced"
+    rm -f "$BACKUP_ROOT/.gc-pending"
+    find "$BACKUP_ROOT/projects" -type f ! -name root -exec cut -f1 {} + \
+        | LC_ALL=C sort -u > "$referenced"
+    [ -d "$BACKUP_ROOT/objects" ] || return 0
+    (cd "$BACKUP_ROOT/objects" && find . -type f -name '*.gz') \
+        | awk -v R="$referenced" '
+            BEGIN { while ((getline h < R) > 0) keep[h] = 1 }
+            { h = $0; gsub(/[.\/]|gz$/, "", h); if (!(h in keep)) print }
+        ' | (cd "$BACKUP_ROOT/objects" && tr '\n' '\0' | xargs -0 rm -f)
+}
+
+# Resolve snapshot $2 (default latest) of project backup dir $1
+backup_resolve() {
+    local id="${2:-$(backup_latest "$1")}"
+    if [ -z "$id" ] || [ ! -f "$1/$id" ]; then
+        echo -e "${COLOR_RED}❌ No such backup: ${2:-(none)}${COLOR_RESET}" >&2
+        return 1
+    fi
+    echo "$id"
+}
+
+backup_list() {
+    local project="$1" id files bytes
+    for id in $(backup_ids "$project"); do
+        files="$(wc -l < "$project/$id" | tr -d ' ')"
+        bytes="$(awk -F '\t' '{ s += $2 } END { print s + 0 }' "$project/$id")"
+        printf '%s  %5d files  %10d bytes\n' "$id" "$files" "$bytes"
+    done
+}
+
+backup_diff() {
+    local project="$1" dir="$2" id snapshot current rel hash
+    id="$(backup_resolve "$project" "$3")" || return 1
+    snapshot="$project/$id"
+    current="$WORK_DIR/backup.current"
+    (cd "$dir" && stat_files | cut -f3 | hash_files) > "$current" || true
+
+    awk -F '\t' -v C="$current" '
+        BEGIN { while ((getline l < C) > 0) cur[substr(l, 67)] = substr(l, 1, 64) }
+        {
+            seen[$4] = 1
+            if (!($4 in cur)) print "removed\t" $1 "\t" $4
+            else if (cur[$4] != $1) print "modified\t" $1 "\t" $4
+        }
+        END { for (p in cur) if (!(p in seen)) print "added\t-\t" p }
+    ' "$snapshot" | LC_ALL=C sort -t "$(printf '\t')" -k3 \
+        | while IFS="$(printf '\t')" read -r action hash rel; do
+            case "$action" in
+                added) diff -u --label "a/$rel" --label "b/$rel" /dev/null "$dir/$rel" ;;
+                removed) gzip -dc < "$(backup_object "$hash")" | diff -u --label "a/$rel" --label "b/$rel" - /dev/null ;;
+                modified) gzip -dc < "$(backup_object "$hash")" | diff -u --label "a/$rel" --label "b/$rel" - "$dir/$rel" ;;
+            esac
+        done || true
+}
+
+backup_restore() {
+    local project="$1" dir="$2" id snapshot staging hash size mtime rel mode rest
+    id="$(backup_resolve "$project" "$3")" || return 1
+    snapshot="$WORK_DIR/backup.restore"
+    cp "$project/$id" "$snapshot"
+
+    # Keep the current state restorable too. Its prune must not drop the
+    # snapshot being restored and leave its objects to the next GC.
+    if [ -d "$dir" ]; then
+        BACKUP_PROTECT="$id" backup_create "$dir"
+    fi
+
+    # setup.sh's EXIT trap removes $BACKUP_STAGING if a step below fails
+    staging="$dir.restore.$$"
+    BACKUP_STAGING="$staging"
+    mkdir -p "$staging"
+    while IFS="$(printf '\t')" read -r hash size mtime rel mode rest; do
+        mkdir -p "$(dirname "$staging/$rel")"
+        gzip -dc < "$(backup_object "$hash")" > "$staging/$rel"
+        if [ -n "$mode" ]; then
+            # Restored files are private copies, even if store links were read-only
+            chmod "$mode" "$staging/$rel"
+            chmod u+w "$staging/$rel"
+        else
+            case "$rel" in hooks/*) chmod +x "$staging/$rel" ;; esac
+        fi
+    done < "$snapshot"
+
+    rm -rf "$dir"
+    mv "$staging" "$dir"
+    BACKUP_STAGING=""
+    echo "♻️  Restored backup $id ($(wc -l < "$snapshot" | tr -d ' ') files)"
+}
+
+# Fold .claude.backup.<timestamp> directories next to $1 into the store
+backup_import_legacy() {
+    local dir="$1" legacy id
+    for legacy in "$dir".backup.*; do
+        [ -d "$legacy" ] || continue
+        id="${legacy##*.backup.}"
+        backup_create "$legacy" "$id" > /dev/null
+        rm -rf "$legacy"
+        echo "📥 Imported $(basename "$legacy")"
+    done
+}
+
+backup_main() {
+    local dir="$1" command="${2:-list}" project
+    shift 2 2> /dev/null || shift $#
+
+    local args=()
+    while [ $# -gt 0 ]; do
+        case "$1" in
+            --keep) BACKUP_KEEP="$2"; shift 2 ;;
+            --max-age) BACKUP_MAX_AGE_DAYS="$2"; shift 2 ;;
+            -h|--help) backup_usage; return 0 ;;
+            *) args+=("$1"); shift ;;
+        esac
+    done
+
+    project="$(backup_project_dir "$dir")"
+    case "$command" in
+        create)
+            [ -d "$dir" ] || { echo "📭 No .claude directory to back up"; return 0; }
+            backup_create "$dir"
+            ;;
+        list) backup_list "$project" ;;
+        diff) backup_diff "$project" "$dir" "${args[0]:-}" ;;
+        restore) backup_restore "$project" "$dir" "${args[0]:-}" ;;
+        prune)
+            backup_prune "$project"
+            backup_gc
+            ;;
+        import-legacy) backup_import_legacy "$dir" ;;
+        *) backup_usage; return 1 ;;
+    esac
+    backup_gc_pending
+}
@@ -0,0 +1,152 @@
+# Parallel multi-project apply for setup.sh
+#
+# Sourced by setup.sh. The template is hashed once, then each project root is
+# synced by a worker from a bounded xargs pool. Every worker prints one JSON
+# line to stdout; progress and the final tally go to stderr.
+
+batch_usage() {
+    cat >&2 << 'EOF'
+Usage: setup.sh batch [--jobs N] [--mode MODE] [--glob PATTERN]... [ROOT...]
+
+Project roots come from ROOT arguments, --glob patterns, or newline-separated
+paths on stdin (when no roots are given or ROOT is "-").
+
+Each project prints one JSON line:
+  {"root": ..., "status": "changed|skipped|failed", "files": N,
+   "bytes": N, "duration_ms": N, "error": ...}
+EOF
+}
+
+cpu_count() {
+    getconf _NPROCESSORS_ONLN 2> /dev/null \
+        || sysctl -n hw.ncpu 2> /dev/null \
+        || echo 4
+}
+
+now_ms() {
+    if [ -n "${EPOCHREALTIME:-}" ]; then
+        local t="${EPOCHREALTIME/[.,]/}"
+        echo "${t:0:${#t}-3}"
+    else
+        echo "$(($(date +%s) * 1000))"
+    fi
+}
+
+json_escape() {
+    local s="$1"
+    s="${s//\\/\\\\}"
+    s="${s//\"/\\\"}"
+    s="${s//$'\t'/\\t}"
+    s="${s//$'\n'/\\n}"
+    printf '%s' "$s"
+}
+
+# Sync one project root and print its JSON result line.
+# Runs inside an xargs worker, so it must not rely on setup.sh's globals
+# beyond the exported SCRIPT_DIR, TEMPLATE_HASHES and INSTALL_MODE.
+batch_worker() {
+    local root="$1" start status files error
+    local target="$root/.claude"
+    start="$(now_ms)"
+
+    WORK_DIR="$(mktemp -d)"
+    (
+        set -e
+        [ -d "$root" ] || { echo "not a directory" >&2; exit 1; }
+        if [ ! -d "$target" ]; then
+            INSTALL_MODE="${INSTALL_MODE:-$DEFAULT_INSTALL_MODE}"
+            resolve_install_mode "$root"
+        fi
+        if [ -d "$target" ] || [ "$INSTALL_MODE" != "copy" ]; then
+            sync_template "$SCRIPT_DIR/.claude" "$target" > /dev/null
+            files=$((SYNC_ADDED + SYNC_UPDATED + SYNC_MERGED + SYNC_CONFLICTS + SYNC_REMOVED + SYNC_RELINKED + STORE_REPAIRED))
+            bytes="$SYNC_BYTES"
+        else
+            # Fresh project: one bulk copy instead of a copy per file
+            copy_template "$SCRIPT_DIR/.claude" "$target" "$TEMPLATE_HASHES"
+            find "$target/hooks" -type f -exec chmod +x {} + 2> /dev/null || true
+            write_manifest "$target/$MANIFEST_NAME" "$TEMPLATE_HASHES"
+            files="$(wc -l < "$TEMPLATE_HASHES" | tr -d ' ')"
+            bytes="$(cut -c67- "$TEMPLATE_HASHES" | (cd "$target" && tr '\n' '\0' | xargs -0 cat) | wc -c | tr -d ' ')"
+        fi
+        write_settings_local "$target"
+        echo "$files $bytes" > "$WORK_DIR/result"
+    ) 2> "$WORK_DIR/error"
+
+    if [ -f "$WORK_DIR/result" ]; then
+        read -r files bytes < "$WORK_DIR/result"
+        status="skipped"
+        [ "$files" -gt 0 ] && status="changed"
+        error=""
+    else
+        status="failed" files=0 bytes=0
+        error="$(tail -n 1 "$WORK_DIR/error")"
+    fi
+    rm -rf "$WORK_DIR"
+
+    printf '{"root": "%s", "status": "%s", "files": %d, "bytes": %d, "duration_ms": %d, "error": %s}\n' \
+        "$(json_escape "$root")" "$status" "$files" "$bytes" "$(($(now_ms) - start))" \
+        "$([ -n "$error" ] && printf '"%s"' "$(json_escape "$error")" || echo null)"
+}
+
+batch_main() {
+    local jobs roots="$WORK_DIR/roots" results="$WORK_DIR/results" pattern path from_stdin=0
+    jobs="$(cpu_count)"
+    : > "$roots"
+
+    while [ $# -gt 0 ]; do
+        case "$1" in
+            -j|--jobs) jobs="$2"; shift 2 ;;
+            --mode)
+                INSTALL_MODE="$2"
+                shift 2
+                is_install_mode "$INSTALL_MODE" || { batch_usage; return 1; }
+                ;;
+            -g|--glob)
+                pattern="$2"
+                shift 2
+                compgen -G "$pattern" >> "$roots" || true
+                ;;
+            -h|--help) batch_usage; return 0 ;;
+            -) from_stdin=1; shift ;;
+            *) echo "$1" >> "$roots"; shift ;;
+        esac
+    done
+    if [ "$from_stdin" = 1 ] || { [ ! -s "$roots" ] && [ ! -t 0 ]; }; then
+        grep -v '^[[:space:]]*$' >> "$roots" || true
+    fi
+    if [ ! -s "$roots" ]; then
+        batch_usage
+        return 1
+    fi
+
+    # Hash the template once for every worker
+    TEMPLATE_HASHES="$WORK_DIR/template"
+    build_template_manifest "$SCRIPT_DIR/.claude" "$TEMPLATE_HASHES"
+    if [ "${INSTALL_MODE:-$DEFAULT_INSTALL_MODE}" != "copy" ]; then
+        store_import "$SCRIPT_DIR/.claude" "$TEMPLATE_HASHES"
+    fi
+    warn_shared_links
+    export SCRIPT_DIR TEMPLATE_HASHES INSTALL_MODE
+
+    local start
+    start="$(now_ms)"
+    tr '\n' '\0' < "$roots" | xargs -0 -n 1 -P "$jobs" bash -c '
+        . "$SCRIPT_DIR/lib/sync.sh"
+        . "$SCRIPT_DIR/lib/store.sh"
+        . "$SCRIPT_DIR/lib/backup.sh"
+        . "$SCRIPT_DIR/lib/batch.sh"
+        batch_worker "$1"
+    ' _ | tee "$results"
+    # Workers only mark pruned objects; collect them once for the whole batch
+    backup_gc_pending
+
+    local total changed failed
+    total="$(wc -l < "$results" | tr -d ' ')"
+    changed="$(grep -c '"status": "changed"' "$results" || true)"
+    failed="$(grep -c '"status": "failed"' "$results" || true)"
+    echo "📊 $total projects: $changed changed, $((total - changed - failed)) skipped," \
+        "$failed failed in $(($(now_ms) - start))ms ($jobs jobs)" >&2
+
+    [ "$failed" -eq 0 ]
+}
@@ -0,0 +1,279 @@
+# Shared content-addressed template store for setup.sh
+#
+# Sourced by setup.sh. Template files are stored once under
+# $STORE_DIR/objects/<aa>/<rest-of-sha256> and projects receive reflinks,
+# hardlinks or symlinks to them instead of full copies.
+#
+# Reflinks (the default) are copy-on-write, so an edit in a project never
+# reaches the store. Hardlinks and symlinks share the object itself: its
+# read-only bits stop an accidental write by a normal user, but not root or
+# 'chmod u+w'. Syncs therefore re-hash the objects they use, quarantine
+# corrupted ones and re-place project files that were still linked to them.
+#
+# Objects are never removed by a sync. 'setup.sh store gc' deletes those that
+# neither the current template nor a registered hardlink/symlink project
+# ($STORE_DIR/projects, updated by every sync in those modes) refers to.
+
+STORE_DIR="${CLAUDE_TEMPLATE_STORE:-$HOME/.claude-template/.store}"
+INSTALL_MODES="copy hardlink reflink symlink"
+DEFAULT_INSTALL_MODE="reflink"
+
+# Files users are expected to edit are always real copies
+MATERIALIZE_PATTERNS="${CLAUDE_TEMPLATE_MATERIALIZE:-CLAUDE.md settings.json}"
+
+STORE_PROJECTS="$STORE_DIR/projects"
+
+store_usage() {
+    cat << 'EOF'
+Usage: setup.sh store <command>
+
+Commands:
+  gc                Delete objects no longer used by the template or by any
+                    hardlink/symlink project (projects installed before this
+                    command existed must be synced once first)
+EOF
+}
+
+is_install_mode() {
+    case " $INSTALL_MODES " in *" $1 "*) return 0 ;; esac
+    return 1
+}
+
+store_object() {
+    echo "$STORE_DIR/objects/${1:0:2}/${1:2}"
+}
+
+# Hardlinks and symlinks share one file with every project using the object
+warn_shared_links() {
+    case "$INSTALL_MODE" in
+        hardlink|symlink)
+            echo -e "${COLOR_YELLOW}⚠️  --mode $INSTALL_MODE shares one file between all projects: an in-place" \
+                "write (as root or after chmod u+w) changes it everywhere until the next sync repairs it." \
+                "Use reflink or copy unless disk space matters more.${COLOR_RESET}" >&2
+            ;;
+    esac
+}
+
+device_id() {
+    stat -c %d "$1" 2> /dev/null || stat -f %d "$1"
+}
+
+# Reflinks need a copy-on-write filesystem (Btrfs, XFS, APFS). Where directory
+# $1 cannot reflink from the store, switch INSTALL_MODE to plain copies. The
+# probe writes a file into $1, so its result is cached per pair of devices and
+# later syncs leave the project alone.
+resolve_install_mode() {
+    local probe="$STORE_DIR/.reflink-probe.$$" copy="$1/.reflink-probe.$$" cache result
+    [ "$INSTALL_MODE" = reflink ] || return 0
+    mkdir -p "$STORE_DIR" "$1"
+    cache="$STORE_DIR/.reflink.$(device_id "$STORE_DIR")-$(device_id "$1")"
+    result="$(cat "$cache" 2> /dev/null || true)"
+    if [ -z "$result" ]; then
+        echo probe > "$probe"
+        if cp --reflink=always "$probe" "$copy" 2> /dev/null \
+            || cp -c "$probe" "$copy" 2> /dev/null; then
+            result="reflink"
+        else
+            result="copy"
+        fi
+        rm -f "$probe" "$copy"
+        echo "$result" > "$cache"
+    fi
+    INSTALL_MODE="$result"
+}
+
+# Move objects listed in manifest $1 whose content no longer matches their
+# hash to $STORE_DIR/corrupt. Moving keeps the inode, so hardlinks to it stay
+# recognizable (link count > 1) until store_repair_links replaces them.
+store_quarantine() {
+    local line name
+    [ -d "$STORE_DIR/objects" ] || return 0
+    cut -c1-64 "$1" | LC_ALL=C sort -u | while IFS= read -r name; do
+        [ -f "$STORE_DIR/objects/${name:0:2}/${name:2}" ] && echo "${name:0:2}/${name:2}"
+    done | (cd "$STORE_DIR/objects" && hash_files) | while IFS= read -r line; do
+        name="${line:66}"
+        [ "${line:0:2}/${line:2:62}" = "$name" ] && continue
+        mkdir -p "$STORE_DIR/corrupt"
+        # Another worker may have quarantined it already
+        mv -f "$STORE_DIR/objects/$name" "$STORE_DIR/corrupt/${name/\//}.$$" 2> /dev/null || continue
+        echo -e "${COLOR_YELLOW}⚠️  Store object ${name/\//} was modified in place, re-importing${COLOR_RESET}" >&2
+    done
+}
+
+# Copy every file of template manifest $2 (rooted at $1) that is not yet in
+# the store, after quarantining existing objects that were corrupted. Objects
+# are read-only and executable when a template file with that content is.
+store_import() {
+    local src="$1" line hash rel obj
+    store_quarantine "$2"
+    while IFS= read -r line; do
+        hash="${line:0:64}"
+        rel="${line:66}"
+        obj="$STORE_DIR/objects/${hash:0:2}/${hash:2}"
+        if [ -f "$obj" ]; then
+            # Objects from before modes followed the template
+            [ ! -x "$src/$rel" ] || [ -x "$obj" ] || chmod 555 "$obj"
+            continue
+        fi
+        mkdir -p "$(dirname "$obj")"
+        cp "$src/$rel" "$obj.$$"
+        if [ -x "$src/$rel" ]; then
+            chmod 555 "$obj.$$"
+        else
+            chmod 444 "$obj.$$"
+        fi
+        mv -f "$obj.$$" "$obj"
+    done < "$2"
+}
+
+# Remember .claude directory $1 as linked into the store, so store_gc keeps
+# the objects its manifest lists
+store_register() {
+    local dir
+    dir="$(cd "$1" && pwd)"
+    mkdir -p "$STORE_DIR"
+    grep -qxF "$dir" "$STORE_PROJECTS" 2> /dev/null || echo "$dir" >> "$STORE_PROJECTS"
+}
+
+# Delete objects that neither template manifest $1 nor a registered project's
+# manifest lists and that no file hardlinks. Forgets projects that are gone.
+store_gc() {
+    local referenced="$WORK_DIR/store.referenced" live="$WORK_DIR/store.live" unused="$WORK_DIR/store.unused" dir
+    [ -d "$STORE_DIR/objects" ] || { echo "🧹 Store is empty"; return 0; }
+    : > "$live"
+    {
+        cut -c1-64 "$1"
+        while IFS= read -r dir; do
+            [ -f "$dir/$MANIFEST_NAME" ] || continue
+            echo "$dir" >> "$live"
+            grep -v '^#' "$dir/$MANIFEST_NAME" | cut -c1-64
+        done < <(cat "$STORE_PROJECTS" 2> /dev/null)
+    } | LC_ALL=C sort -u > "$referenced"
+    mv -f "$live" "$STORE_PROJECTS"
+
+    # Temporary "<hash>.<pid>" files of an import in flight are not objects
+    (cd "$STORE_DIR/objects" && find . -type f -links 1) \
+        | awk -v R="$referenced" '
+            BEGIN { while ((getline h < R) > 0) keep[h] = 1 }
+            { h = $0; gsub(/[.\/]/, "", h); if (length(h) == 64 && h !~ /[^0-9a-f]/ && !(h in keep)) print }
+        ' > "$unused"
+    (cd "$STORE_DIR/objects" && tr '\n' '\0' < "$unused" | xargs -0 rm -f)
+    find "$STORE_DIR/objects" -mindepth 1 -type d -empty -delete 2> /dev/null || true
+    if [ -d "$STORE_DIR/corrupt" ]; then
+        find "$STORE_DIR/corrupt" -type f -links 1 -exec rm -f {} +
+    fi
+    echo "🧹 Removed $(wc -l < "$unused" | tr -d ' ') unused store objects"
+}
+
+store_main() {
+    case "${1:-}" in
+        gc)
+            build_template_manifest "$SCRIPT_DIR/.claude" "$WORK_DIR/template"
+            store_gc "$WORK_DIR/template"
+            ;;
+        -h|--help) store_usage ;;
+        *) store_usage; return 1 ;;
+    esac
+}
+
+# Project $2 was installed from manifest body $4 and the template is now $1
+# with manifest $3. Files still linked into the store (symlinks into it, or
+# hardlinks) cannot hold local edits, so any that no longer match the
+# installed hash were corrupted through the store: re-place them. Sets
+# STORE_REPAIRED to the number of repaired files.
+store_repair_links() {
+    local src="$1" target="$2" template="$3" base="$4" rel hash repaired=0
+    cut -c67- "$base" | (cd "$target" && while IFS= read -r rel; do
+        if [ -L "$rel" ]; then
+            case "$(readlink "$rel")" in "$STORE_DIR"/*) echo "$rel" ;; esac
+        elif [ -f "$rel" ] && [ "$(link_count "$rel")" -gt 1 ]; then
+            echo "$rel"
+        fi
+    done | hash_files) > "$WORK_DIR/linked"
+
+    awk 'FILENAME == ARGV[1] { base[substr($0, 67)] = $1; next }
+        { rel = substr($0, 67); if ((rel in base) && base[rel] != $1) print rel }
+    ' "$base" "$WORK_DIR/linked" > "$WORK_DIR/corrupted"
+
+    while IFS= read -r rel; do
+        hash="$(awk -v p="$rel" 'substr($0, 67) == p { print $1 }' "$template")"
+        if [ -n "$hash" ]; then
+            place_file "$src/$rel" "$hash" "$rel" "$target/$rel"
+        else
+            rm -f "$target/$rel"
+        fi
+        echo -e "  ${COLOR_YELLOW}repaired: $rel (store copy had been modified)${COLOR_RESET}" >&2
+        repaired=$((repaired + 1))
+    done < "$WORK_DIR/corrupted"
+
+    # Quarantined objects nothing links to any more can go
+    if [ -d "$STORE_DIR/corrupt" ]; then
+        find "$STORE_DIR/corrupt" -type f -links 1 -exec rm -f {} +
+    fi
+    STORE_REPAIRED="$repaired"
+}
+
+needs_copy() {
+    local pattern
+    for pattern in $MATERIALIZE_PATTERNS; do
+        # shellcheck disable=SC2254
+        case "$1" in $pattern) return 0 ;; esac
+    done
+    return 1
+}
+
+# Place template file $1 (relative path $3, hash $2) at $4 using INSTALL_MODE.
+# Sets PLACED_BYTES to the number of bytes actually written.
+place_file() {
+    local src="$1" hash="$2" rel="$3" dst="$4" obj
+    obj="$(store_object "$hash")"
+    PLACED_BYTES=0
+    mkdir -p "$(dirname "$dst")"
+
+    if [ "$INSTALL_MODE" != "copy" ] && [ -f "$obj" ] && ! needs_copy "$rel"; then
+        rm -f "$dst"
+        case "$INSTALL_MODE" in
+            hardlink) ln "$obj" "$dst" 2> /dev/null && return 0 ;;
+            symlink) ln -s "$obj" "$dst" && return 0 ;;
+            reflink)
+                if cp --reflink=always "$obj" "$dst" 2> /dev/null \
+                    || cp -c "$obj" "$dst" 2> /dev/null; then
+                    # A private copy: writable, executable like its template file
+                    chmod u+w "$dst"
+                    if [ -x "$src" ]; then chmod +x "$dst"; else chmod a-x "$dst"; fi
+                    return 0
+                fi
+                ;;
+        esac
+        # Fall through to a plain copy, e.g. hardlink across filesystems
+    fi
+
+    rm -f "$dst"
+    cp "$src" "$dst"
+    case "$rel" in hooks/*) chmod +x "$dst" ;; esac
+    PLACED_BYTES="$(file_size "$dst")"
+}
+
+# Replace links under $1 (or the given files) with private writable copies.
+materialize() {
+    local path tmp
+    for path in "$@"; do
+        if [ -d "$path" ]; then
+            find "$path" \( -type f -o -type l \) -print | while IFS= read -r path; do
+                materialize "$path"
+            done
+            continue
+        fi
+        if [ -L "$path" ] || [ "$(link_count "$path")" -gt 1 ]; then
+            tmp="$path.materialize.$$"
+            cp "$path" "$tmp"
+            chmod u+w "$tmp"
+            mv -f "$tmp" "$path"
+            echo "  materialized: $path"
+        fi
+    done
+}
+
+link_count() {
+    stat -c %h "$1" 2> /dev/null || stat -f %l "$1"
+}
@@ -0,0 +1,280 @@
+# Manifest-based incremental sync for setup.sh
+#
+# Sourced by setup.sh. The manifest (.claude/.template-manifest) records the
+# SHA-256 of every template file at install/sync time, so a later sync can tell
+# template changes apart from local edits without touching unchanged files.
+
+MANIFEST_NAME=".template-manifest"
+
+# Print "<sha256>  <path>" for each newline-separated relative path on stdin.
+# Hashes everything in a single process so cost stays flat with file count.
+hash_files() {
+    local list
+    list="$(cat)"
+    [ -n "$list" ] || return 0
+    if command -v sha256sum > /dev/null 2>&1; then
+        printf '%s\n' "$list" | tr '\n' '\0' | xargs -0 sha256sum --
+    else
+        printf '%s\n' "$list" | tr '\n' '\0' | xargs -0 shasum -a 256 --
+    fi
+}
+
+hash_stdin() {
+    if command -v sha256sum > /dev/null 2>&1; then
+        sha256sum | cut -d' ' -f1
+    else
+        shasum -a 256 | cut -d' ' -f1
+    fi
+}
+
+file_size() {
+    wc -c < "$1" | tr -d ' '
+}
+
+# List template files relative to $1, excluding per-machine and sync artefacts.
+# In a git checkout only tracked and non-ignored files count, so caches such as
+# __pycache__ or .claude/.cache never reach projects or the fingerprint.
+list_template_files() {
+    if git -C "$1" rev-parse --is-inside-work-tree > /dev/null 2>&1; then
+        (cd "$1" && git ls-files --cached --others --exclude-standard -- . \
+            | while IFS= read -r path; do [ -f "$path" ] && echo "$path"; done)
+    else
+        (cd "$1" && find . \( -name __pycache__ -o -name .cache \) -prune -o -type f -print \
+            | sed 's|^\./||')
+    fi | grep -v -e "^$MANIFEST_NAME\$" -e '^settings\.local\.json$' -e '\.template-new$' \
+        -e '^\.cache/' -e '__pycache__/' -e '\.py[co]$' | LC_ALL=C sort -u
+}
+
+# Copy the files listed in template manifest body $3 from $1 into $2, keeping
+# their modes, in one pass.
+copy_template() {
+    mkdir -p "$2"
+    cut -c67- "$3" | (cd "$1" && tar -cf - -T -) | (cd "$2" && tar -xpf -)
+}
+
+# Write the template manifest body for $1 into $2.
+build_template_manifest() {
+    list_template_files "$1" | (cd "$1" && hash_files) > "$2"
+}
+
+# Read a "# <key> <value>" header field from manifest $1.
+manifest_field() {
+    [ -f "$1" ] || return 0
+    sed -n "s/^# $2 //p" "$1" | head -n 1
+}
+
+# Write manifest $1 from template manifest body $2.
+write_manifest() {
+    local fingerprint commit
+    fingerprint="$(hash_stdin < "$2")"
+    commit="$(git -C "$SCRIPT_DIR" rev-parse HEAD 2> /dev/null || echo -)"
+    {
+        echo "# claude-template manifest v1"
+        echo "# commit $commit"
+        echo "# fingerprint $fingerprint"
+        echo "# mode ${INSTALL_MODE:-copy}"
+        cat "$2"
+    } > "$1.tmp"
+    mv "$1.tmp" "$1"
+}
+
+# Decide what to do with each file given the template ($1), base ($2) and
+# local ($3) hashes. Prints "<action>\t<hash>\t<path>" lines, where <hash> is
+# the template hash (or the base hash for files dropped from the template):
+#   add      new template file, not present locally
+#   update   template changed, local copy untouched
+#   merge    template and local copy both changed
+#   edited   local edit, template unchanged (left alone)
+#   deleted  removed locally, still in template (left alone)
+#   remove   dropped from template, local copy untouched
+#   orphan   dropped from template, local copy edited (left alone)
+#   same     already identical
+sync_plan() {
+    awk -v T="$1" -v B="$2" '
+        FILENAME == T { t[substr($0, 67)] = $1; next }
+        FILENAME == B { if ($0 !~ /^#/) b[substr($0, 67)] = $1; next }
+        { l[substr($0, 67)] = $1 }
+        END {
+            for (p in t) {
+                if (!(p in l))               a = (p in b) ? "deleted" : "add"
+                else if (l[p] == t[p])       a = "same"
+                else if (p in b && b[p] == t[p]) a = "edited"
+                else if (p in b && b[p] == l[p]) a = "update"
+                else                         a = "merge"
+                print a "\t" t[p] "\t" p
+            }
+            for (p in b) {
+                if (p in t || !(p in l)) continue
+                print ((l[p] == b[p]) ? "remove" : "orphan") "\t" b[p] "\t" p
+            }
+        }
+    ' "$1" "$2" "$3" | LC_ALL=C sort -t "$(printf '\t')" -k3
+}
+
+# Three-way merge template file $1 into local file $2, using the base recorded
+# at $3 (commit) with expected hash $4. Returns non-zero on conflict or when the
+# base cannot be recovered from the template's git history.
+merge_file() {
+    local src="$1" dst="$2" commit="$3" base_hash="$4" rel="$5"
+    local base="$WORK_DIR/merge.base" merged="$WORK_DIR/merge.out"
+
+    [ -n "$commit" ] && [ "$commit" != "-" ] || return 1
+    git -C "$SCRIPT_DIR" show "$commit:.claude/$rel" > "$base" 2> /dev/null || return 1
+    [ "$(hash_stdin < "$base")" = "$base_hash" ] || return 1
+
+    cp "$dst" "$merged"
+    git merge-file -q "$merged" "$base" "$src" 2> /dev/null || return 1
+    # Replace rather than overwrite, in case dst is still linked to the store
+    rm -f "$dst"
+    cp "$merged" "$dst"
+}
+
+# Incrementally bring $2 in line with template $1.
+sync_template() {
+    local src="$1" target="$2"
+    local manifest="$target/$MANIFEST_NAME"
+    local template_hashes="$WORK_DIR/template" base_hashes="$WORK_DIR/base"
+    local local_hashes="$WORK_DIR/local" plan="$WORK_DIR/plan"
+    local commit fingerprint action hash rel base_hash recorded_mode relink=0 imported=0
+
+    # Batch runs hash the template once and share it through TEMPLATE_HASHES
+    if [ -n "${TEMPLATE_HASHES:-}" ]; then
+        template_hashes="$TEMPLATE_HASHES"
+    else
+        build_template_manifest "$src" "$template_hashes"
+    fi
+    fingerprint="$(hash_stdin < "$template_hashes")"
+
+    # Keep the recorded install mode unless a different one was requested;
+    # manifests from before install modes existed were plain copies
+    if [ -f "$manifest" ]; then
+        recorded_mode="$(manifest_field "$manifest" mode)"
+        recorded_mode="${recorded_mode:-copy}"
+    else
+        recorded_mode="$DEFAULT_INSTALL_MODE"
+    fi
+    INSTALL_MODE="${INSTALL_MODE:-$recorded_mode}"
+    resolve_install_mode "$(dirname "$target")"
+    if [ -f "$manifest" ] && [ "$INSTALL_MODE" != "$recorded_mode" ]; then
+        relink=1
+    fi
+
+    if [ -f "$manifest" ]; then
+        grep -v '^#' "$manifest" > "$base_hashes" || true
+    else
+        : > "$base_hashes"
+    fi
+
+    # Shared objects can be written through a link, so verify them every time
+    SYNC_ADDED=0 SYNC_UPDATED=0 SYNC_MERGED=0 SYNC_CONFLICTS=0 SYNC_REMOVED=0 SYNC_KEPT=0 SYNC_BYTES=0
+    SYNC_RELINKED=0
+    STORE_REPAIRED=0
+    if [ "$INSTALL_MODE" = hardlink ] || [ "$INSTALL_MODE" = symlink ]; then
+        mkdir -p "$target"
+        store_register "$target"
+    fi
+    if [ "$recorded_mode" = hardlink ] || [ "$recorded_mode" = symlink ]; then
+        store_import "$src" "$template_hashes"
+        imported=1
+        if [ -f "$manifest" ]; then
+            store_repair_links "$src" "$target" "$template_hashes" "$base_hashes"
+        fi
+    fi
+
+    if [ "$relink" = 0 ] && [ "$fingerprint" = "$(manifest_field "$manifest" fingerprint)" ]; then
+        if [ "$STORE_REPAIRED" -gt 0 ]; then
+            echo "🩹 Repaired $STORE_REPAIRED files corrupted through the shared store"
+        else
+            echo "✨ Already up to date"
+        fi
+        return 0
+    fi
+
+    commit="$(manifest_field "$manifest" commit)"
+    if [ ! -f "$manifest" ] && [ -n "$(ls -A "$target" 2> /dev/null)" ]; then
+        echo -e "${COLOR_YELLOW}⚠️  No manifest found, local differences will be kept${COLOR_RESET}"
+    fi
+    mkdir -p "$target"
+
+    cut -c67- "$template_hashes" "$base_hashes" | LC_ALL=C sort -u \
+        | (cd "$target" && while IFS= read -r rel; do
+            [ -f "$rel" ] && echo "$rel"
+        done | hash_files) > "$local_hashes" || true
+
+    sync_plan "$template_hashes" "$base_hashes" "$local_hashes" > "$plan"
+    # Snapshot first if the sync is going to rewrite or delete local files
+    if [ "${CLAUDE_TEMPLATE_BACKUP:-1}" != 0 ] && grep -qE '^(update|merge|remove)' "$plan"; then
+        backup_create "$target"
+    fi
+    if [ "$INSTALL_MODE" != "copy" ] && [ "$imported" = 0 ]; then
+        store_import "$src" "$template_hashes"
+    fi
+
+    while IFS="$(printf '\t')" read -r action hash rel; do
+        case "$action" in
+            same)
+                # Switching install modes re-places files that are unchanged
+                if [ "$relink" = 1 ]; then
+                    place_file "$src/$rel" "$hash" "$rel" "$target/$rel"
+                    SYNC_BYTES=$((SYNC_BYTES + PLACED_BYTES))
+                    SYNC_RELINKED=$((SYNC_RELINKED + 1))
+                fi
+                ;;
+            add|update)
+                place_file "$src/$rel" "$hash" "$rel" "$target/$rel"
+                echo "  ${action}: $rel"
+                SYNC_BYTES=$((SYNC_BYTES + PLACED_BYTES))
+                if [ "$action" = add ]; then
+                    SYNC_ADDED=$((SYNC_ADDED + 1))
+                else
+                    SYNC_UPDATED=$((SYNC_UPDATED + 1))
+                fi
+                ;;
+            merge)
+                base_hash="$(awk -v p="$rel" 'substr($0, 67) == p { print $1 }' "$base_hashes")"
+                if merge_file "$src/$rel" "$target/$rel" "$commit" "$base_hash" "$rel"; then
+                    echo "  merged: $rel"
+                    SYNC_BYTES=$((SYNC_BYTES + $(file_size "$target/$rel")))
+                    SYNC_MERGED=$((SYNC_MERGED + 1))
+                else
+                    cp "$src/$rel" "$target/$rel.template-new"
+                    SYNC_BYTES=$((SYNC_BYTES + $(file_size "$target/$rel.template-new")))
+                    echo -e "  ${COLOR_YELLOW}conflict: $rel (template version saved as $rel.template-new)${COLOR_RESET}"
+                    SYNC_CONFLICTS=$((SYNC_CONFLICTS + 1))
+                fi
+                ;;
+            remove)
+                rm -f "$target/$rel"
+                echo "  removed: $rel"
+                SYNC_REMOVED=$((SYNC_REMOVED + 1))
+                ;;
+            edited|deleted|orphan)
+                SYNC_KEPT=$((SYNC_KEPT + 1))
+                ;;
+        esac
+    done < "$plan"
+
+    write_manifest "$manifest" "$template_hashes"
+
+    if [ "$STORE_REPAIRED" -gt 0 ]; then
+        echo "🩹 Repaired $STORE_REPAIRED files corrupted through the shared store"
+    fi
+    if [ "$SYNC_RELINKED" -gt 0 ]; then
+        echo "🔗 Re-placed $SYNC_RELINKED unchanged files as $INSTALL_MODE"
+    fi
+    echo "📊 $SYNC_ADDED added, $SYNC_UPDATED updated, $SYNC_MERGED merged," \
+        "$SYNC_CONFLICTS conflicts, $SYNC_REMOVED removed, $SYNC_KEPT kept (local edits)"
+}
+
+# Create settings.local.json in $1 unless it already exists
+write_settings_local() {
+    [ -f "$1/settings.local.json" ] && return 0
+    cat > "$1/settings.local.json" << 'EOF'
+{
+  "permissions": {
+    "allow": [],
+    "deny": []
+  }
+}
+EOF
+}
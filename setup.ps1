@@ -1,6 +1,162 @@
 # Claude Template Setup Script for Windows PowerShell
+#
+# Usage:
+#   setup.ps1          Back up any existing .claude and install a fresh copy
+#   setup.ps1 sync     Apply only template changes, keeping local edits
+
+param(
+    [ValidateSet("install", "sync")]
+    [string]$Command = "install"
+)
 
 $ErrorActionPreference = "Stop"
+$ManifestName = ".template-manifest"
+
+# SHA-256 of every template file, keyed by forward-slash relative path
+# Template files relative to $Root. In a git checkout only tracked and
+# non-ignored files count, so caches never reach projects or the fingerprint.
+function Get-TemplateFiles($Root) {
+    $Listed = $null
+    if (Get-Command git -ErrorAction SilentlyContinue) {
+        $Listed = git -C $Root ls-files --cached --others --exclude-standard -- . 2>$null
+        if ($LASTEXITCODE -ne 0) { $Listed = $null }
+    }
+    if ($null -eq $Listed) {
+        $Listed = Get-ChildItem -Path $Root -Recurse -File -Force |
+            ForEach-Object { $_.FullName.Substring($Root.Length + 1).Replace("\", "/") }
+    }
+    return $Listed |
+        Where-Object {
+            $_ -ne $ManifestName -and $_ -ne "settings.local.json" -and $_ -notlike "*.template-new" -and
+            $_ -notlike ".cache/*" -and $_ -notlike "*__pycache__/*" -and $_ -notmatch "\.py[co]$" -and
+            (Test-Path -LiteralPath (Join-Path $Root $_) -PathType Leaf)
+        } |
+        Sort-Object -Unique
+}
+
+function Get-TemplateHashes($Root) {
+    $Hashes = [ordered]@{}
+    foreach ($Rel in Get-TemplateFiles $Root) {
+        $Hashes[$Rel] = (Get-FileHash -Algorithm SHA256 -LiteralPath (Join-Path $Root $Rel)).Hash.ToLower()
+    }
+    return $Hashes
+}
+
+function Get-LocalHash($Path) {
+    if (-not (Test-Path -LiteralPath $Path -PathType Leaf)) { return $null }
+    return (Get-FileHash -Algorithm SHA256 -LiteralPath $Path).Hash.ToLower()
+}
+
+function Get-StringHash($Text) {
+    $Sha = [System.Security.Cryptography.SHA256]::Create()
+    $Bytes = $Sha.ComputeHash([System.Text.Encoding]::UTF8.GetBytes($Text))
+    return -join ($Bytes | ForEach-Object { $_.ToString("x2") })
+}
+
+function Format-ManifestBody($Hashes) {
+    return (($Hashes.Keys | ForEach-Object { "$($Hashes[$_])  $_" }) -join "`n") + "`n"
+}
+
+function Read-Manifest($Path) {
+    $Manifest = @{ Fields = @{}; Hashes = @{} }
+    if (-not (Test-Path -LiteralPath $Path)) { return $null }
+    foreach ($Line in Get-Content -LiteralPath $Path) {
+        if ($Line -match '^# (\w+) (.+)$') { $Manifest.Fields[$Matches[1]] = $Matches[2] }
+        elseif ($Line.Length -gt 66) { $Manifest.Hashes[$Line.Substring(66)] = $Line.Substring(0, 64) }
+    }
+    return $Manifest
+}
+
+function Write-Manifest($Path, $Hashes) {
+    $Body = Format-ManifestBody $Hashes
+    $Commit = "-"
+    if (Get-Command git -ErrorAction SilentlyContinue) {
+        $Head = git -C $ScriptDir rev-parse HEAD 2>$null
+        if ($LASTEXITCODE -eq 0) { $Commit = $Head }
+    }
+    $Header = "# claude-template manifest v1`n# commit $Commit`n# fingerprint $(Get-StringHash $Body)`n"
+    [System.IO.File]::WriteAllText($Path, $Header + $Body)
+}
+
+# Three-way merge via git; returns $false on conflict or when the base is unavailable
+function Merge-TemplateFile($Source, $Destination, $Rel, $Commit, $BaseHash) {
+    if (-not $Commit -or $Commit -eq "-" -or -not (Get-Command git -ErrorAction SilentlyContinue)) { return $false }
+    $Base = New-TemporaryFile
+    $Merged = New-TemporaryFile
+    try {
+        $Blob = git -C $ScriptDir rev-parse "${Commit}:.claude/$Rel" 2>$null
+        if ($LASTEXITCODE -ne 0) { return $false }
+        cmd /c "git -C `"$ScriptDir`" cat-file blob $Blob > `"$($Base.FullName)`""
+        if ((Get-LocalHash $Base.FullName) -ne $BaseHash) { return $false }
+        Copy-Item -LiteralPath $Destination -Destination $Merged.FullName -Force
+        git merge-file -q $Merged.FullName $Base.FullName $Source 2>$null
+        if ($LASTEXITCODE -ne 0) { return $false }
+        [System.IO.File]::WriteAllBytes($Destination, [System.IO.File]::ReadAllBytes($Merged.FullName))
+        return $true
+    } finally {
+        Remove-Item $Base.FullName, $Merged.FullName -Force -ErrorAction SilentlyContinue
+    }
+}
+
+function Sync-Template($Source, $Target) {
+    $ManifestPath = Join-Path $Target $ManifestName
+    $Template = Get-TemplateHashes $Source
+    $Manifest = Read-Manifest $ManifestPath
+    if ($Manifest -and $Manifest.Fields["fingerprint"] -eq (Get-StringHash (Format-ManifestBody $Template))) {
+        Write-Host "✨ Already up to date"
+        return
+    }
+    if (-not $Manifest) {
+        Write-Host "⚠️  No manifest found, local differences will be kept" -ForegroundColor Yellow
+        $Manifest = @{ Fields = @{}; Hashes = @{} }
+    }
+    $Base = $Manifest.Hashes
+    $Counts = [ordered]@{ added = 0; updated = 0; merged = 0; conflicts = 0; removed = 0; kept = 0 }
+
+    foreach ($Rel in $Template.Keys) {
+        $Src = Join-Path $Source $Rel
+        $Dst = Join-Path $Target $Rel
+        $Local = Get-LocalHash $Dst
+        if (-not $Local) {
+            if ($Base.ContainsKey($Rel)) { $Counts.kept++; continue }
+            New-Item -ItemType Directory -Force -Path (Split-Path -Parent $Dst) | Out-Null
+            Copy-Item -LiteralPath $Src -Destination $Dst -Force
+            Write-Host "  add: $Rel"
+            $Counts.added++
+        } elseif ($Local -eq $Template[$Rel]) {
+            continue
+        } elseif ($Base[$Rel] -eq $Template[$Rel]) {
+            $Counts.kept++
+        } elseif ($Base[$Rel] -eq $Local) {
+            Copy-Item -LiteralPath $Src -Destination $Dst -Force
+            Write-Host "  update: $Rel"
+            $Counts.updated++
+        } elseif (Merge-TemplateFile $Src $Dst $Rel $Manifest.Fields["commit"] $Base[$Rel]) {
+            Write-Host "  merged: $Rel"
+            $Counts.merged++
+        } else {
+            Copy-Item -LiteralPath $Src -Destination "$Dst.template-new" -Force
+            Write-Host "  conflict: $Rel (template version saved as $Rel.template-new)" -ForegroundColor Yellow
+            $Counts.conflicts++
+        }
+    }
+    foreach ($Rel in $Base.Keys) {
+        if ($Template.Contains($Rel)) { continue }
+        $Dst = Join-Path $Target $Rel
+        $Local = Get-LocalHash $Dst
+        if (-not $Local) { continue }
+        if ($Local -eq $Base[$Rel]) {
+            Remove-Item -LiteralPath $Dst -Force
+            Write-Host "  removed: $Rel"
+            $Counts.removed++
+        } else {
+            $Counts.kept++
+        }
+    }
+
+    Write-Manifest $ManifestPath $Template
+    Write-Host "📊 $($Counts.added) added, $($Counts.updated) updated, $($Counts.merged) merged, $($Counts.conflicts) conflicts, $($Counts.removed) removed, $($Counts.kept) kept (local edits)"
+}
 
 Write-Host "🚀 Claude Template Setup" -ForegroundColor Green
 Write-Host ""
@@ -13,6 +169,18 @@ Write-Host "📂 Source: $ScriptDir\.claude"
 Write-Host "📂 Target: $TargetDir"
 Write-Host ""
 
+if ($Command -eq "sync") {
+    if (Test-Path $TargetDir) {
+        Write-Host "🔄 Syncing .claude template..."
+        Sync-Template "$ScriptDir\.claude" $TargetDir
+        Write-Host ""
+        Write-Host "✅ Sync complete!" -ForegroundColor Green
+        exit 0
+    }
+    Write-Host "📭 No existing .claude directory, installing instead"
+    Write-Host ""
+}
+
 # Backup existing .claude directory
 if (Test-Path $TargetDir) {
     $BackupDir = "$TargetDir.backup.$(Get-Date -Format 'yyyyMMdd_HHmmss')"
@@ -24,7 +192,12 @@ if (Test-Path $TargetDir) {
 
 # Copy .claude directory
 Write-Host "📋 Copying .claude template..."
-Copy-Item -Path "$ScriptDir\.claude" -Destination $TargetDir -Recurse
+$TemplateHashes = Get-TemplateHashes "$ScriptDir\.claude"
+foreach ($Rel in $TemplateHashes.Keys) {
+    $Dst = Join-Path $TargetDir $Rel
+    New-Item -ItemType Directory -Path (Split-Path $Dst -Parent) -Force | Out-Null
+    Copy-Item -LiteralPath (Join-Path "$ScriptDir\.claude" $Rel) -Destination $Dst -Force
+}
 
 # Create settings.local.json if it doesn't exist
 $SettingsLocalPath = Join-Path $TargetDir "settings.local.json"
@@ -40,6 +213,9 @@ if (-not (Test-Path $SettingsLocalPath)) {
 "@ | Out-File -FilePath $SettingsLocalPath -Encoding UTF8
 }
 
+# Record template hashes so later syncs only touch what changed
+Write-Manifest (Join-Path $TargetDir $ManifestName) $TemplateHashes
+
 Write-Host ""
 Write-Host "✅ Setup complete!" -ForegroundColor Green
 Write-Host ""
@@ -52,4 +228,5 @@ Write-Host "💡 Tips:"
 Write-Host "  - settings.local.json is gitignored by default"
 Write-Host "  - Hooks work in WSL/Git Bash (not native PowerShell)"
 Write-Host "  - Add project-specific commands in .claude\commands\"
+Write-Host "  - Run 'setup.ps1 sync' after updating the template to keep local edits"
 Write-Host ""
@@ -1,5 +1,21 @@
 #!/bin/bash
 # Claude Template Setup Script for WSL/Linux/Mac
+#
+# Usage:
+#   setup.sh          Back up any existing .claude and install a fresh copy
+#   setup.sh sync     Apply only template changes, keeping local edits
+#   setup.sh batch    Sync many project roots in parallel (JSON lines output)
+#   setup.sh backup [create|list|diff|restore|prune|import-legacy]
+#                     Manage compressed .claude snapshots kept outside the project
+#   setup.sh materialize PATH...
+#                     Turn store links into private, writable copies
+#   setup.sh store gc Delete store objects no project or template uses
+#
+# Options (install, sync, batch):
+#   --mode copy|hardlink|reflink|symlink
+#                     How template files are placed (default: reflink, or copy
+#                     where the filesystem cannot reflink); non-copy modes
+#                     share objects in ~/.claude-template/.store
 
 set -e
 
@@ -8,47 +24,131 @@ COLOR_YELLOW='\033[1;33m'
 COLOR_RED='\033[0;31m'
 COLOR_RESET='\033[0m'
 
-echo -e "${COLOR_GREEN}🚀 Claude Template Setup${COLOR_RESET}"
-echo ""
-
 # Get the script directory (where setup.sh is located)
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 TARGET_DIR="$(pwd)/.claude"
+COMMAND="install"
+case "${1:-}" in
+    ""|-*) ;;
+    *) COMMAND="$1"; shift ;;
+esac
+INSTALL_MODE="${CLAUDE_TEMPLATE_MODE:-}"
+
+# shellcheck source=lib/sync.sh
+. "$SCRIPT_DIR/lib/sync.sh"
+# shellcheck source=lib/store.sh
+. "$SCRIPT_DIR/lib/store.sh"
+# shellcheck source=lib/backup.sh
+. "$SCRIPT_DIR/lib/backup.sh"
+
+WORK_DIR="$(mktemp -d)"
+BACKUP_STAGING=""
+trap 'rm -rf "$WORK_DIR" ${BACKUP_STAGING:+"$BACKUP_STAGING"}' EXIT
+
+# Batch mode keeps stdout machine-readable, so it runs before the banner
+if [ "$COMMAND" = "batch" ]; then
+    # shellcheck source=lib/batch.sh
+    . "$SCRIPT_DIR/lib/batch.sh"
+    batch_main "$@"
+    exit $?
+fi
+
+if [ "$COMMAND" = "backup" ]; then
+    backup_main "$TARGET_DIR" "$@"
+    exit $?
+fi
+
+if [ "$COMMAND" = "store" ]; then
+    store_main "$@"
+    exit $?
+fi
+
+if [ "$COMMAND" = "materialize" ]; then
+    materialize "$@"
+    exit 0
+fi
+
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --mode) INSTALL_MODE="$2"; shift 2 ;;
+        *)
+            echo -e "${COLOR_RED}❌ Unknown option: $1${COLOR_RESET}"
+            exit 1
+            ;;
+    esac
+done
+if [ -n "$INSTALL_MODE" ] && ! is_install_mode "$INSTALL_MODE"; then
+    echo -e "${COLOR_RED}❌ Unknown mode: $INSTALL_MODE (expected: $INSTALL_MODES)${COLOR_RESET}"
+    exit 1
+fi
+warn_shared_links
+
+echo -e "${COLOR_GREEN}🚀 Claude Template Setup${COLOR_RESET}"
+echo ""
 
 echo "📂 Source: $SCRIPT_DIR/.claude"
 echo "📂 Target: $TARGET_DIR"
 echo ""
 
+case "$COMMAND" in
+    install) ;;
+    sync)
+        if [ -d "$TARGET_DIR" ]; then
+            echo "🔄 Syncing .claude template..."
+            sync_template "$SCRIPT_DIR/.claude" "$TARGET_DIR"
+            backup_gc_pending
+            echo ""
+            echo -e "${COLOR_GREEN}✅ Sync complete!${COLOR_RESET}"
+            exit 0
+        fi
+        echo "📭 No existing .claude directory, installing instead"
+        echo ""
+        ;;
+    *)
+        echo -e "${COLOR_RED}❌ Unknown command: $COMMAND${COLOR_RESET}"
+        echo "Usage: setup.sh [install|sync|batch|backup|store|materialize] [--mode MODE]"
+        exit 1
+        ;;
+esac
+
 # Backup existing .claude directory
 if [ -d "$TARGET_DIR" ]; then
-    BACKUP_DIR="${TARGET_DIR}.backup.$(date +%Y%m%d_%H%M%S)"
     echo -e "${COLOR_YELLOW}⚠️  .claude directory already exists${COLOR_RESET}"
-    echo "📦 Creating backup: $BACKUP_DIR"
-    mv "$TARGET_DIR" "$BACKUP_DIR"
+    echo "📦 Creating backup in $BACKUP_ROOT"
+    backup_create "$TARGET_DIR"
+    backup_gc_pending
+    rm -rf "$TARGET_DIR"
     echo ""
 fi
 
-# Copy .claude directory
-echo "📋 Copying .claude template..."
-cp -r "$SCRIPT_DIR/.claude" "$TARGET_DIR"
+# Reflink by default; plain copies where the filesystem cannot reflink
+INSTALL_MODE="${INSTALL_MODE:-$DEFAULT_INSTALL_MODE}"
+resolve_install_mode "$(pwd)"
+
+if [ "$INSTALL_MODE" = "copy" ]; then
+    # Copy .claude directory
+    echo "📋 Copying .claude template..."
+    build_template_manifest "$SCRIPT_DIR/.claude" "$WORK_DIR/template"
+    copy_template "$SCRIPT_DIR/.claude" "$TARGET_DIR" "$WORK_DIR/template"
+
+    # Make hooks executable
+    if [ -d "$TARGET_DIR/hooks" ]; then
+        echo "🔧 Making hooks executable..."
+        chmod +x "$TARGET_DIR/hooks"/*
+    fi
 
-# Make hooks executable
-if [ -d "$TARGET_DIR/hooks" ]; then
-    echo "🔧 Making hooks executable..."
-    chmod +x "$TARGET_DIR/hooks"/*
+    # Record template hashes so later syncs only touch what changed
+    write_manifest "$TARGET_DIR/$MANIFEST_NAME" "$WORK_DIR/template"
+else
+    # Link template files from the shared store
+    echo "🔗 Linking .claude template from $STORE_DIR ($INSTALL_MODE)..."
+    sync_template "$SCRIPT_DIR/.claude" "$TARGET_DIR" > /dev/null
 fi
 
 # Create settings.local.json if it doesn't exist
 if [ ! -f "$TARGET_DIR/settings.local.json" ]; then
     echo "📝 Creating settings.local.json..."
-    cat > "$TARGET_DIR/settings.local.json" << 'EOF'
-{
-  "permissions": {
-    "allow": [],
-    "deny": []
-  }
-}
-EOF
+    write_settings_local "$TARGET_DIR"
 fi
 
 echo ""
@@ -63,4 +163,7 @@ echo "💡 Tips:"
 echo "  - settings.local.json is gitignored by default"
 echo "  - Hooks are automatically executable"
 echo "  - Add project-specific commands in .claude/commands/"
+echo "  - Run 'setup.sh sync' after updating the template to keep local edits"
+echo "  - Linked files are read-only; run 'setup.sh materialize <file>' before editing"
+echo "  - Backups: 'setup.sh backup list', 'setup.sh backup restore [ID]'"
 echo ""
@@ -0,0 +1,77 @@
+"""Regression tests for 'setup.sh backup' (lib/backup.sh)."""
+
+import glob
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+SETUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "setup.sh")
+
+
+class BackupTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test-backup-")
+        self.addCleanup(shutil.rmtree, self.root)
+        self.project = os.path.join(self.root, "project")
+        self.claude = os.path.join(self.project, ".claude")
+        os.makedirs(self.claude)
+        self.env = dict(os.environ, CLAUDE_TEMPLATE_STORE=os.path.join(self.root, "store"))
+
+    def write(self, text, mtime=None):
+        path = os.path.join(self.claude, "notes.md")
+        with open(path, "w") as handle:
+            handle.write(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def read(self):
+        with open(os.path.join(self.claude, "notes.md")) as handle:
+            return handle.read()
+
+    def backup(self, *args, check=True):
+        result = subprocess.run(
+            ["bash", SETUP, "backup", *args], cwd=self.project, env=self.env, capture_output=True, text=True
+        )
+        if check:
+            self.assertEqual(result.returncode, 0, result.stderr)
+        return result
+
+    def ids(self):
+        return [line.split()[0] for line in self.backup("list").stdout.splitlines()]
+
+    def test_same_size_edit_with_the_same_mtime_is_backed_up(self):
+        self.write("cccc", mtime=1700000000)
+        self.backup("create")
+        self.write("dddd", mtime=1700000000)
+        self.assertNotIn("Unchanged", self.backup("create").stdout)
+        self.write("eeee")
+        self.backup("restore")
+        self.assertEqual(self.read(), "dddd")
+
+    def test_restoring_the_oldest_snapshot_survives_its_own_prune(self):
+        self.env["CLAUDE_TEMPLATE_BACKUP_KEEP"] = "3"
+        for text in ["aaaa", "bbbb", "cccc"]:
+            self.write(text)
+            self.backup("create")
+        self.assertEqual(len(self.ids()), 3)
+        oldest = self.ids()[0]
+        self.write("dddd")
+        self.backup("restore", oldest)
+        self.assertEqual(self.read(), "aaaa")
+        self.assertIn(oldest, self.ids())
+        self.assertEqual(glob.glob(self.claude + ".restore.*"), [])
+
+    def test_failed_restore_removes_the_staging_dir(self):
+        self.write("aaaa")
+        self.backup("create")
+        shutil.rmtree(os.path.join(self.root, "store", "backups", "objects"))
+        self.write("bbbb")
+        self.assertNotEqual(self.backup("restore", check=False).returncode, 0)
+        self.assertEqual(glob.glob(self.claude + ".restore.*"), [])
+        self.assertEqual(self.read(), "bbbb")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Regression tests for 'setup.sh batch' (lib/batch.sh)."""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+SETUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "setup.sh")
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test-batch-")
+        self.addCleanup(shutil.rmtree, self.root)
+        self.project = os.path.join(self.root, "project")
+        os.makedirs(self.project)
+        self.env = dict(os.environ, CLAUDE_TEMPLATE_STORE=os.path.join(self.root, "store"))
+
+    def setup(self, *args):
+        result = subprocess.run(["bash", SETUP, *args], cwd=self.project, env=self.env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_mode_switch_counts_relinked_files(self):
+        self.setup("--mode", "copy")
+        line = json.loads(self.setup("batch", "--mode", "hardlink", self.project))
+        script = os.path.join(self.project, ".claude", "scripts", "test_impact.py")
+        self.assertGreater(os.stat(script).st_nlink, 1)
+        self.assertEqual(line["status"], "changed")
+        self.assertGreater(line["files"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Regression tests for the .claude/hooks/pre-commit result cache."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+HOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".claude", "hooks", "pre-commit")
+
+# Stand-in for Biome: 'var' is an error under strict/ or when a config that
+# applies (root, the file's directory, or an extended shared.json) says "strict"
+BIOME = """#!/bin/bash
+[ "$1" = --version ] && { echo "Version: test"; exit 0; }
+status=0
+for path in "$@"; do
+    [ -f "$path" ] || continue
+    strict=0
+    case "$path" in strict/*) strict=1 ;; esac
+    grep -qs strict biome.json "$(dirname "$path")/biome.json" shared.json && strict=1
+    if [ "$strict" = 1 ] && grep -q var "$path"; then
+        echo "$path: no var"
+        status=1
+    fi
+done
+exit $status
+"""
+
+
+class PreCommitCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test-pre-commit-")
+        self.addCleanup(shutil.rmtree, self.root)
+        self.git("init", "-q")
+        self.write("biome.json", "{}\n")
+        self.write("node_modules/.bin/biome", BIOME)
+        os.chmod(os.path.join(self.root, "node_modules", ".bin", "biome"), 0o755)
+        self.write(".gitignore", "node_modules/\n")
+        self.write("src/a.ts", "var a = 1;\n")
+        self.git("add", "-A")
+
+    def write(self, rel, text):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as handle:
+            handle.write(text)
+
+    def git(self, *args):
+        subprocess.run(["git", *args], cwd=self.root, check=True, capture_output=True)
+
+    def hook(self):
+        env = dict(os.environ)
+        env.pop("BIOME_PRECOMMIT_CACHE", None)
+        return subprocess.run([HOOK], cwd=self.root, env=env, capture_output=True, text=True)
+
+    def test_unchanged_files_are_not_checked_again(self):
+        self.assertEqual(self.hook().returncode, 0)
+        self.assertIn("unchanged since last check", self.hook().stdout)
+
+    def test_same_blob_at_another_path_is_checked(self):
+        self.assertEqual(self.hook().returncode, 0)
+        self.write("strict/a.ts", "var a = 1;\n")
+        self.git("add", "-A")
+        self.assertNotEqual(self.hook().returncode, 0)
+
+    def test_nested_config_change_invalidates_the_cache(self):
+        self.write("src/biome.json", "{}\n")
+        self.git("add", "-A")
+        self.assertEqual(self.hook().returncode, 0)
+        self.write("src/biome.json", '{"strict": true}\n')
+        self.git("add", "-A")
+        self.assertNotEqual(self.hook().returncode, 0)
+
+    def test_extended_config_change_invalidates_the_cache(self):
+        self.write("biome.json", '{"extends": ["./shared.json"]}\n')
+        self.write("shared.json", "{}\n")
+        self.git("add", "-A")
+        self.assertEqual(self.hook().returncode, 0)
+        self.write("shared.json", '{"strict": true}\n')
+        self.git("add", "-A")
+        self.assertNotEqual(self.hook().returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Regression tests for the shared template store (lib/store.sh)."""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+SETUP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "setup.sh")
+
+
+class StoreTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test-store-")
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = os.path.join(self.root, "store")
+        self.env = dict(os.environ, CLAUDE_TEMPLATE_STORE=self.store)
+
+    def setup(self, project, *args):
+        path = os.path.join(self.root, project)
+        os.makedirs(path, exist_ok=True)
+        result = subprocess.run(["bash", SETUP, *args], cwd=path, env=self.env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def add_object(self, content):
+        digest = hashlib.sha256(content).hexdigest()
+        path = os.path.join(self.store, "objects", digest[:2], digest[2:])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as handle:
+            handle.write(content)
+        return digest, path
+
+    def test_linked_scripts_keep_their_executable_bit(self):
+        self.setup("project", "--mode", "symlink")
+        script = os.path.join(self.root, "project", ".claude", "scripts", "test_impact.py")
+        self.assertTrue(os.access(script, os.X_OK))
+
+    def test_gc_keeps_objects_of_linked_projects_only(self):
+        self.setup("project", "--mode", "symlink")
+        _, unused = self.add_object(b"old template file\n")
+        digest, used = self.add_object(b"still linked\n")
+        with open(os.path.join(self.root, "project", ".claude", ".template-manifest"), "a") as handle:
+            handle.write(f"{digest}  old.md\n")
+        self.setup("project", "store", "gc")
+        self.assertFalse(os.path.exists(unused))
+        self.assertTrue(os.path.exists(used))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "project", ".claude", "scripts", "test_impact.py")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Regression tests for .claude/scripts/test_impact.py selection."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".claude", "scripts", "test_impact.py")
+
+
+class SelectTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test-impact-")
+        self.addCleanup(shutil.rmtree, self.root)
+        self.write("src/data.json", '{"answer": 42}\n')
+        self.write("src/f.ts", 'import data from "./data.json";\nexport const f = () => data.answer;\n')
+        self.write("src/f.test.ts", 'import { f } from "./f";\ntest("f", () => expect(f()).toBe(42));\n')
+        self.write("src/g.ts", "export const g = 1;\n")
+        self.write("src/g.test.ts", 'import { g } from "./g";\n')
+        self.git("init", "-q")
+        self.git("add", "-A")
+        self.git("-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-qm", "init")
+        self.impact("build")
+
+    def write(self, rel, text):
+        path = os.path.join(self.root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as handle:
+            handle.write(text)
+
+    def git(self, *args):
+        subprocess.run(["git", *args], cwd=self.root, check=True, capture_output=True)
+
+    def impact(self, *args):
+        return subprocess.run(
+            [sys.executable, SCRIPT, *args], cwd=self.root, capture_output=True, text=True
+        )
+
+    def select(self):
+        return json.loads(self.impact("select", "--json").stdout)
+
+    def test_selects_tests_reaching_a_changed_source(self):
+        self.write("src/g.ts", "export const g = 2;\n")
+        result = self.select()
+        self.assertFalse(result["full"])
+        self.assertEqual(result["tests"], ["src/g.test.ts"])
+
+    def test_unindexed_file_runs_the_full_suite(self):
+        self.write("src/data.json", '{"answer": 41}\n')
+        result = self.select()
+        self.assertTrue(result["full"])
+        self.assertIn("src/data.json", result["reason"])
+
+    def test_docs_and_scratch_files_do_not_force_the_full_suite(self):
+        self.write("src/g.ts", "export const g = 2;\n")
+        self.write("README.md", "# Notes\n")
+        self.write("debug.log", "scratch\n")
+        self.write(".claude/settings.local.json", "{}\n")
+        result = self.select()
+        self.assertFalse(result["full"], result["reason"])
+        self.assertEqual(result["tests"], ["src/g.test.ts"])
+
+    def test_non_source_file_next_to_sources_runs_the_full_suite(self):
+        self.write("src/fixture.txt", "input\n")
+        self.assertTrue(self.select()["full"])
+
+    def test_ignore_globs_are_configurable(self):
+        self.write("src/data.json", '{"answer": 41}\n')
+        self.assertFalse(json.loads(self.impact("select", "--json", "--ignore", "src/*.json").stdout)["full"])
+
+    def test_run_does_not_pass_when_an_unindexed_file_changed(self):
+        self.write("src/data.json", '{"answer": 41}\n')
+        self.assertNotEqual(self.impact("run", "--", "false").returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
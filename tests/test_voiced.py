@@ -0,0 +1,63 @@
+"""Regression tests for the voice notification hook and worker."""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+
+HOOK = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".claude", "hooks", "voice_notifications", "post-task.sh"
+)
+
+
+class VoiceTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="test-voiced-")
+        self.addCleanup(shutil.rmtree, self.root)
+        self.log = os.path.join(self.root, "voice.log")
+        self.env = dict(
+            os.environ,
+            XDG_RUNTIME_DIR=self.root,
+            XDG_CACHE_HOME=os.path.join(self.root, "cache"),
+            CLAUDE_VOICE_BACKEND="stub",
+            CLAUDE_VOICE_STUB_LOG=self.log,
+            CLAUDE_VOICE_COALESCE_MS="300",
+            CLAUDE_VOICE_MAX_WAIT_MS="600",
+        )
+        self.env.pop("CLAUDE_HOOK_TRACE", None)
+
+    def notify(self, message):
+        subprocess.run([HOOK, message], env=self.env, input=b"{}", check=True)
+
+    def plays(self):
+        try:
+            with open(self.log) as handle:
+                return [json.loads(line) for line in handle]
+        except OSError:
+            return []
+
+    def wait_for(self, count, timeout=10):
+        deadline = time.monotonic() + timeout
+        while len(self.plays()) < count and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return self.plays()
+
+    def test_burst_is_announced_once(self):
+        for _ in range(3):
+            self.notify("Task completed")
+        self.assertEqual([play["text"] for play in self.wait_for(1)], ["3 tasks completed"])
+
+    def test_steady_completions_do_not_postpone_the_announcement(self):
+        started = time.time()
+        for _ in range(20):  # One every 100ms, always inside the 300ms quiet period
+            self.notify("Task completed")
+            time.sleep(0.1)
+        first = self.wait_for(1)[0]
+        self.assertLess(first["time"] - started, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()